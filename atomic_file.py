@@ -0,0 +1,33 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+# The umask can only be read by setting it, so it is read once at import rather than while other threads create files
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+@contextmanager
+def atomic_writer(path, mode='w', newline=None):
+    """
+    Opens a uniquely named temporary file next to `path` and renames it to
+    `path` once the block completes; on failure the temporary file is
+    removed and `path` is left untouched. `mode` is 'w' (UTF-8 text) or 'wb'.
+    Readers never see a half-written file, and two processes writing the
+    same file do not share a temporary file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        if 'b' in mode:
+            file = os.fdopen(fd, mode)
+        else:
+            file = os.fdopen(fd, mode, encoding='utf-8', newline=newline)
+        with file:
+            yield file
+        # mkstemp creates the file as 0600; give it the mode open() would have used
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
@@ -0,0 +1,81 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+from atomic_file import atomic_writer
+from bib_index import normalize_name
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_FILE = os.environ.get('PUB_APP_AUTHOR_REGISTRY', 'author_registry.json')
+
+# Identifier kinds stored per author
+SOURCES = ('orcid', 'semantic_scholar', 'google_scholar', 'dblp')
+# A search that found no profile is repeated after this many days (it may have been a captcha or timeout)
+NOT_FOUND_RETRY_DAYS = int(os.environ.get('PUB_APP_AUTHOR_RETRY_DAYS', 7))
+
+
+class AuthorRegistry:
+    """
+    Persistent mapping of group members to their identifiers on each source.
+
+    The file is plain JSON keyed by the normalized "first last" name, e.g.
+
+        {"max mustermann": {"name": "Max Mustermann", "dblp": "12/3456",
+                            "semantic_scholar": "1234567", "resolved": {...}}}
+
+    so a wrong automatic match can be corrected by editing the file. An empty
+    string marks an author known to have no profile on that source. Empty
+    results of a search expire after NOT_FOUND_RETRY_DAYS, so the author is
+    looked up again; an empty string entered by hand (without a `resolved`
+    date) is kept.
+    """
+
+    def __init__(self, filename=REGISTRY_FILE):
+        self.filename = filename
+        self._lock = threading.Lock()
+        self.authors = {}
+        if os.path.exists(filename):
+            try:
+                with open(filename, 'r', encoding='utf-8') as file:
+                    self.authors = json.load(file)
+            except (OSError, ValueError):
+                logger.exception(f"Could not read author registry {filename}")
+
+    @staticmethod
+    def key(first_name, last_name):
+        return normalize_name(f"{first_name} {last_name}")
+
+    def get(self, first_name, last_name, source):
+        """Returns the stored ID, '' if the author has no profile there, or None if unknown."""
+        with self._lock:
+            entry = self.authors.get(self.key(first_name, last_name), {})
+            value = entry.get(source)
+            if value == '' and self._expired(entry.get('resolved', {}).get(source)):
+                return None
+            return value
+
+    @staticmethod
+    def _expired(resolved):
+        if not resolved:
+            return False
+        try:
+            return date.fromisoformat(resolved) + timedelta(days=NOT_FOUND_RETRY_DAYS) <= date.today()
+        except ValueError:
+            return True
+
+    def set(self, first_name, last_name, source, value):
+        if source not in SOURCES:
+            raise ValueError(f"Unknown identifier source: {source}")
+        with self._lock:
+            entry = self.authors.setdefault(self.key(first_name, last_name), {'name': f"{first_name} {last_name}".strip()})
+            entry[source] = value
+            entry.setdefault('resolved', {})[source] = time.strftime('%Y-%m-%d')
+            self._save()
+
+    def _save(self):
+        with atomic_writer(self.filename) as file:
+            json.dump(self.authors, file, indent=2, ensure_ascii=False, sort_keys=True)
@@ -0,0 +1,469 @@
+"""
+Benchmark harness for the publication pipeline.
+
+Generates synthetic BibTeX libraries and crawled sets, replays API responses
+from a local stub server and times load, normalize, dedup, compare, render
+and write, and compares the JSON and binary publication caches. Every run is
+appended to benchmark_results.jsonl together with the current git revision,
+so regressions show up between versions.
+
+Examples:
+    python benchmark.py --sizes 1000 10000
+    python benchmark.py --sizes 100000 --near-dup-rate 0.2 --skip-render
+    python benchmark.py --record --fixtures benchmark_fixtures --author "Ephraim Zimmer"
+    python benchmark.py --fixtures benchmark_fixtures --author "Ephraim Zimmer"   # replay offline
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tkinter as tk
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from xml.sax.saxutils import escape
+
+import pandas as pd
+import requests
+from bibtexparser.bibdatabase import BibDatabase
+from bibtexparser.bparser import BibTexParser
+from bibtexparser.bwriter import BibTexWriter
+
+import exporter
+import pub_cache
+import pub_compare
+import tk_pub_app
+from author_registry import AuthorRegistry
+from metrics import metrics
+
+RESULTS_FILE = 'benchmark_results.jsonl'
+BENCH_AUTHOR = ('Max', 'Mustermann')
+
+# Upstream APIs the stub server stands in for (prefix -> real base URL)
+UPSTREAMS = {
+    'crossref': 'https://api.crossref.org',
+    's2': 'https://api.semanticscholar.org/graph/v1',
+    'dblp': 'https://dblp.org',
+}
+
+WORDS = (
+    "adaptive secure network traffic privacy edge cloud learning federated distributed "
+    "wireless sensor mobile resilient routing protocol detection intrusion anomaly attack "
+    "smart contract blockchain latency energy efficient scheduling offloading programmable "
+    "data plane measurement analysis framework approach towards robust scalable system"
+).split()
+FIRST_NAMES = "Anna Ben Clara David Eva Felix Greta Hannes Ida Jonas Karla Lukas Mia Noah Paula".split()
+LAST_NAMES = "Becker Fischer Hoffmann Koch Klein Meyer Richter Schmidt Schulz Wagner Weber Wolf".split()
+
+
+# ---------------------------------------------------------------------------
+# Synthetic corpora
+# ---------------------------------------------------------------------------
+
+def _title(rng):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 12))).capitalize()
+
+
+def _authors(rng, include_bench_author):
+    names = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(rng.randint(1, 5))]
+    if include_bench_author:
+        names.insert(rng.randrange(len(names) + 1), ' '.join(BENCH_AUTHOR))
+    return names
+
+
+def _near_duplicate(rng, pub):
+    """Returns a copy of `pub` as another source might report it."""
+    dup = dict(pub)
+    words = dup['title'].split()
+    mutation = rng.randrange(4)
+    if mutation == 0 and len(words) > 3:
+        del words[rng.randrange(len(words))]
+    elif mutation == 1:
+        words = [w.upper() if rng.random() < 0.3 else w for w in words]
+    elif mutation == 2:
+        words[-1] += rng.choice(['.', ':', '?'])
+    else:
+        dup['doi'] = ''
+    dup['title'] = ' '.join(words)
+    return dup
+
+
+def generate_library(size, seed=0, author_rate=0.2):
+    """Generates `size` BibTeX entries; `author_rate` of them list the benchmark author."""
+    rng = random.Random(seed)
+    entries = []
+    for i in range(size):
+        entries.append({
+            'ENTRYTYPE': 'article',
+            'ID': f"lib{i}",
+            'title': _title(rng),
+            'author': ' and '.join(_authors(rng, rng.random() < author_rate)),
+            'year': str(rng.randint(2000, 2024)),
+            'doi': f"10.{rng.randint(1000, 9999)}/bench.{i}" if rng.random() < 0.8 else '',
+        })
+    return entries
+
+
+def generate_crawled(library, size, overlap=0.6, near_dup_rate=0.1, seed=1):
+    """
+    Generates `size` crawled records. `overlap` of them are copies of library
+    entries, `near_dup_rate` of all records are perturbed copies of another
+    crawled record (as returned by a second source), the rest are new.
+    """
+    rng = random.Random(seed)
+    crawled = []
+    for i in range(size):
+        roll = rng.random()
+        if crawled and roll < near_dup_rate:
+            pub = _near_duplicate(rng, rng.choice(crawled))
+        elif library and roll < near_dup_rate + overlap:
+            pub = dict(rng.choice(library))
+        else:
+            pub = {
+                'ENTRYTYPE': 'article',
+                'title': _title(rng),
+                'author': ', '.join(_authors(rng, True)),
+                'year': str(rng.randint(2000, 2024)),
+                'doi': f"10.{rng.randint(1000, 9999)}/new.{i}",
+            }
+        pub['author'] = pub['author'].replace(' and ', ', ')
+        pub['ID'] = pub['doi'] or f"BENCH_{i}"
+        crawled.append(pub)
+    return crawled
+
+
+def write_bibtex_text(entries):
+    bib_db = BibDatabase()
+    bib_db.entries = entries
+    writer = BibTexWriter()
+    writer.indent = '    '
+    return writer.write(bib_db)
+
+
+# ---------------------------------------------------------------------------
+# Stub server replaying recorded API responses
+# ---------------------------------------------------------------------------
+
+def fixture_key(path, query=''):
+    canonical = path + ('?' + urlencode(sorted(parse_qsl(query))) if query else '')
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+class StubServer:
+    """
+    Serves recorded API responses from `fixture_dir`.
+
+    Requests are looked up by path and query first and by path alone second,
+    so synthetic fixtures keep working when a fetcher changes its parameters.
+    In record mode, missing fixtures are fetched from the real API and saved.
+    """
+
+    def __init__(self, fixture_dir, record=False):
+        self.fixture_dir = fixture_dir
+        self.record = record
+        os.makedirs(fixture_dir, exist_ok=True)
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, body = stub.lookup(self.path)
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def url_for(self, upstream):
+        return f"{self.base_url}/{upstream}"
+
+    def save(self, path, body, query=''):
+        with open(os.path.join(self.fixture_dir, fixture_key(path, query) + '.json'), 'wb') as file:
+            file.write(body)
+
+    def lookup(self, raw_path):
+        parts = urlsplit(raw_path)
+        for key in (fixture_key(parts.path, parts.query), fixture_key(parts.path)):
+            fixture = os.path.join(self.fixture_dir, key + '.json')
+            if os.path.exists(fixture):
+                with open(fixture, 'rb') as file:
+                    return 200, file.read()
+        if self.record:
+            prefix, _, rest = parts.path.lstrip('/').partition('/')
+            if prefix in UPSTREAMS:
+                response = requests.get(f"{UPSTREAMS[prefix]}/{rest}", params=parse_qsl(parts.query))
+                if response.ok:
+                    self.save(parts.path, response.content, parts.query)
+                return response.status_code, response.content
+        return 404, b'{}'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def write_synthetic_fixtures(stub, crawled):
+    """Writes path-only fixtures answering the Crossref, Semantic Scholar and DBLP fetchers with `crawled`."""
+    items = [{
+        'DOI': pub['doi'],
+        'title': [pub['title']],
+        'author': [dict(zip(('given', 'family'), name.split(' ', 1))) for name in pub['author'].split(', ')],
+        'published-print': {'date-parts': [[int(pub['year'])]]},
+        'type': 'journal-article',
+    } for pub in crawled]
+    stub.save('/crossref/works', json.dumps({'message': {'items': items}}).encode())
+    author_id = 'bench-author'
+    stub.save('/s2/author/search', json.dumps({'data': [{'authorId': author_id, 'name': ' '.join(BENCH_AUTHOR), 'paperCount': len(crawled)}]}).encode())
+    papers = [{
+        'paperId': str(i),
+        'title': pub['title'],
+        'year': int(pub['year']),
+        'doi': pub['doi'],
+        'authors': [{'name': name} for name in pub['author'].split(', ')],
+    } for i, pub in enumerate(crawled)]
+    stub.save(f'/s2/author/{author_id}/papers', json.dumps({'data': papers}).encode())
+    hits = [{'info': {
+        'title': pub['title'],
+        'year': pub['year'],
+        'doi': pub['doi'],
+        'key': f"bench/{i}",
+        'authors': {'author': [{'text': name} for name in pub['author'].split(', ')]},
+    }} for i, pub in enumerate(crawled)]
+    stub.save('/dblp/search/publ/api', json.dumps({'result': {'hits': {'hit': hits}}}).encode())
+    person = {'result': {'hits': {'hit': [{'info': {'author': ' '.join(BENCH_AUTHOR), 'url': 'https://dblp.org/pid/00/bench'}}]}}}
+    stub.save('/dblp/search/author/api', json.dumps(person).encode())
+    records = ''.join(
+        f"<r><article key=\"bench/{i}\">"
+        + ''.join(f"<author>{escape(name)}</author>" for name in pub['author'].split(', '))
+        + f"<title>{escape(pub['title'])}</title><year>{pub['year']}</year>"
+        + (f"<ee>https://doi.org/{escape(pub['doi'])}</ee>" if pub['doi'] else '')
+        + "</article></r>"
+        for i, pub in enumerate(crawled)
+    )
+    stub.save('/dblp/pid/00/bench.xml', f"<dblpperson name=\"{' '.join(BENCH_AUTHOR)}\">{records}</dblpperson>".encode())
+
+
+# ---------------------------------------------------------------------------
+# Benchmark run
+# ---------------------------------------------------------------------------
+
+class _HeadlessMaster:
+    """Stands in for the Tk root when no display is available; runs callbacks inline."""
+
+    def after(self, ms, func=None, *args):
+        if func is not None:
+            func(*args)
+
+
+def make_app(with_gui):
+    if with_gui:
+        try:
+            root = tk.Tk()
+            root.withdraw()
+            return tk_pub_app.PublicationApp(root), root
+        except tk.TclError:
+            print("No display available, skipping the render stage.")
+    app = tk_pub_app.PublicationApp.__new__(tk_pub_app.PublicationApp)
+    app.master = _HeadlessMaster()
+    app.update_progress = lambda *args, **kwargs: None
+    app.bib_index = None
+    app.http = requests.Session()
+    app.score_cache = pub_compare.ScoreCache()
+    app.doi_threshold = pub_compare.DOI_THRESHOLD
+    app.title_threshold = pub_compare.TITLE_THRESHOLD
+    app.comparison = None
+    return app, None
+
+
+def write_json_cache(data, path):
+    # The format tu_biblio_api wrote before the binary cache
+    with open(path, 'w') as file:
+        json.dump(data, file, indent=4)
+
+
+def load_json_cache(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'describe', '--always', '--dirty'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_benchmark(size, args, stub):
+    timings = {}
+
+    def timed(stage, func, *func_args):
+        start = time.perf_counter()
+        result = func(*func_args)
+        timings[stage] = time.perf_counter() - start
+        return result
+
+    library = generate_library(size, seed=args.seed)
+    crawled = generate_crawled(library, int(size * args.crawled_ratio), args.overlap, args.near_dup_rate, seed=args.seed + 1)
+    bibtex_str = write_bibtex_text(library)
+
+    app, root = make_app(not args.skip_render)
+    # Resolved author IDs are kept with the fixtures they were recorded with
+    app.author_registry = AuthorRegistry(os.path.join(stub.fixture_dir, 'author_registry.json'))
+    metrics.reset()
+
+    bib_database = timed('load', BibTexParser(common_strings=True).parse, bibtex_str)
+    app.publications = app.organize_by_year(bib_database.entries)
+
+    if not args.skip_fetch:
+        # Recorded fixtures are replayed for a real author, otherwise the synthetic set is served
+        if args.author:
+            first_name, last_name = args.author.rsplit(' ', 1)
+        else:
+            write_synthetic_fixtures(stub, crawled)
+            first_name, last_name = BENCH_AUTHOR
+        tk_pub_app.CROSSREF_API = stub.url_for('crossref')
+        tk_pub_app.SEMANTIC_SCHOLAR_API = stub.url_for('s2')
+        tk_pub_app.DBLP_API = stub.url_for('dblp')
+        timed('fetch.crossref', app.fetch_from_crossref, first_name, last_name, None, len(crawled))
+        timed('fetch.semantic_scholar', app.fetch_from_semantic_scholar, first_name, last_name)
+        timed('fetch.dblp', app.fetch_from_dblp, first_name, last_name)
+
+    unique = timed('dedup', app.remove_duplicates, crawled)
+    years = sorted(app.publications)
+    timed('filter.local', app.convert_to_dataframe, app.publications, years, *BENCH_AUTHOR)
+    # Compare against the whole library so the stage scales with the corpus size
+    local_df = pd.DataFrame(bib_database.entries)
+    crawled_df = pd.DataFrame(unique)
+
+    pairs = len(local_df) * len(crawled_df)
+    if pairs <= args.max_compare_pairs:
+        missing, extra = timed('compare.total', app.compare_publications, local_df, crawled_df)
+        # Split the comparison into its normalize and compare spans
+        spans = metrics.snapshot()['spans']
+        for stage in ('normalize', 'compare'):
+            if stage in spans:
+                timings[stage] = spans[stage]['total']
+        # Threshold changes in the UI only re-classify the cached scores
+        timed('compare.reclassify', app.classify_comparison, *app.comparison)
+    else:
+        print(f"Skipping compare: {pairs} pairs exceed --max-compare-pairs")
+        missing, extra = crawled_df, pd.DataFrame()
+
+    if root is not None:
+        timed('render.missing', app._display_missing_publications, missing)
+        timed('render.extra', app._display_extra_publications, extra)
+        timed('render.bibtex', app._display_missing_bibtex, missing)
+        root.update()
+        root.destroy()
+
+    sizes = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        timed('write.bibtex', app.write_bibtex, unique, os.path.join(tmp, 'bench.bib'))
+        timed('write.csv', exporter.write_csv, unique, os.path.join(tmp, 'bench.csv'))
+        timed('write.jsonl', exporter.write_jsonl, unique, os.path.join(tmp, 'bench.jsonl'))
+
+        # Publication cache: indented JSON against the binary per-year format
+        json_path = os.path.join(tmp, 'cache.json')
+        binary_path = os.path.join(tmp, 'cache.pubc')
+        timed('cache.json.write', write_json_cache, app.publications, json_path)
+        timed('cache.json.load', load_json_cache, json_path)
+        timed('cache.binary.write', pub_cache.write_cache, app.publications, binary_path)
+        timed('cache.binary.load', pub_cache.load_cache, binary_path)
+        timed('cache.binary.load_year', pub_cache.load_year, binary_path, max(app.publications))
+        sizes = {'cache.json': os.path.getsize(json_path), 'cache.binary': os.path.getsize(binary_path)}
+
+    return {
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'revision': git_revision(),
+        'python': sys.version.split()[0],
+        'params': {
+            'size': size,
+            'crawled': len(crawled),
+            'local': len(local_df),
+            'overlap': args.overlap,
+            'near_dup_rate': args.near_dup_rate,
+            'seed': args.seed,
+            'author': args.author,
+        },
+        'timings': timings,
+        'sizes': sizes,
+    }
+
+
+def previous_result(result, filename):
+    """Returns the latest stored result with the same parameters from another revision."""
+    if not os.path.exists(filename):
+        return None
+    latest = None
+    with open(filename, encoding='utf-8') as file:
+        for line in file:
+            old = json.loads(line)
+            if old['params'] == result['params'] and old['revision'] != result['revision']:
+                latest = old
+    return latest
+
+
+def print_result(result, baseline=None):
+    print(f"\nsize={result['params']['size']} crawled={result['params']['crawled']} revision={result['revision']}")
+    header = f"{'Stage':<24}{'Time [s]':>12}"
+    if baseline:
+        header += f"{'Baseline [s]':>14}{'Change':>10}"
+    print(header)
+    print('-' * len(header))
+    for stage, seconds in result['timings'].items():
+        line = f"{stage:<24}{seconds:>12.3f}"
+        if baseline and stage in baseline['timings']:
+            old = baseline['timings'][stage]
+            change = (seconds - old) / old if old else 0.0
+            line += f"{old:>14.3f}{change:>+10.0%}"
+        print(line)
+    for name, size in result.get('sizes', {}).items():
+        print(f"{name:<24}{size / 1e6:>11.2f}M")
+    if baseline:
+        print(f"(baseline: revision {baseline['revision']} from {baseline['timestamp']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the publication comparison pipeline.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000], help="library sizes to benchmark (1k to 1M)")
+    parser.add_argument('--crawled-ratio', type=float, default=0.5, help="crawled set size relative to the library")
+    parser.add_argument('--overlap', type=float, default=0.6, help="share of crawled records that exist locally")
+    parser.add_argument('--near-dup-rate', type=float, default=0.1, help="share of near-duplicate crawled records")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-compare-pairs', type=float, default=5e7, help="skip compare above this many record pairs")
+    parser.add_argument('--fixtures', help="directory with recorded API responses (default: temporary)")
+    parser.add_argument('--record', action='store_true', help="fetch missing fixtures from the live APIs and save them")
+    parser.add_argument('--author', help="replay (or record) fixtures for this real author instead of the synthetic one")
+    parser.add_argument('--skip-fetch', action='store_true')
+    parser.add_argument('--skip-render', action='store_true')
+    parser.add_argument('--results', default=RESULTS_FILE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, StubServer(args.fixtures or tmp, record=args.record) as stub:
+        for size in args.sizes:
+            result = run_benchmark(size, args, stub)
+            print_result(result, previous_result(result, args.results))
+            with open(args.results, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(result) + '\n')
+
+
+if __name__ == "__main__":
+    main()
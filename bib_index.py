@@ -0,0 +1,319 @@
+"""
+Read-only, memory-mapped index of the institutional bibliography.
+
+`build_index` compiles the loaded BibTeX entries into one binary file next
+to the .bib (e.g. TK_Publikationen_Komplett.bib.idx) containing:
+
+    header        magic, version, counts, section offsets, source mtime/size
+    records       per record (offset, length) pairs into the string blob for
+                  normalized title, normalized DOI, year, author and the JSON
+                  payload of the full entry; records are sorted by year
+    doi table     open-addressing hash table (crc32) of normalized DOIs
+    author keys   sorted normalized last names with their postings ranges
+    postings      record ids per author key
+    years         sorted years with their (start, count) record range
+    strings       UTF-8 string blob
+
+`BibIndex` maps the file read-only, so opening it costs no parsing and
+several processes reading the same index share the page cache.
+
+Build from the command line:
+    python bib_index.py TK_Publikationen_Komplett.bib
+"""
+import bisect
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import unicodedata
+import zlib
+from collections import defaultdict
+
+from atomic_file import atomic_writer
+from pub_compare import normalize_text
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'TKPUBIDX'
+VERSION = 1
+
+# magic, version, records, doi capacity, author keys, years, source mtime, source size,
+# offsets of records, doi table, author keys, postings, years, strings
+_HEADER = struct.Struct('<8sIIIIIdQQQQQQQ')
+_FIELDS = ('title', 'doi', 'year', 'author', 'payload')
+_RECORD = struct.Struct('<' + 'QI' * len(_FIELDS))
+_SLOT = struct.Struct('<I')
+_KEY = struct.Struct('<QIII')   # string offset, string length, postings start, postings count
+_YEAR = struct.Struct('<QIII')  # string offset, string length, record start, record count
+
+
+def index_path_for(bib_path):
+    return bib_path + '.idx'
+
+
+def normalize_name(name):
+    name = ''.join(c for c in unicodedata.normalize('NFKD', name) if not unicodedata.combining(c))
+    return re.sub(r'[^\w.\s]', '', name.lower()).strip()
+
+
+def author_keys(author_field):
+    """Returns the normalized last names found in a BibTeX or comma-separated author field."""
+    keys = set()
+    for name in re.split(r'\s+and\s+|,', author_field or ''):
+        parts = normalize_name(name).split()
+        if parts:
+            keys.add(parts[-1])
+    return keys
+
+
+class _StringBlob:
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def add(self, text):
+        data = text.encode('utf-8')
+        offset = self.size
+        self.parts.append(data)
+        self.size += len(data)
+        return offset, len(data)
+
+
+def build_index(entries, path, source=None):
+    """
+    Writes the index for `entries` (BibTeX entry dicts) to `path`. `source`
+    is the .bib file the entries were read from; its mtime and size are
+    stored so `open_index_for` can detect a stale index.
+    """
+    entries = sorted(entries, key=lambda entry: str(entry.get('year', 'Unknown')))
+    blob = _StringBlob()
+
+    records = bytearray()
+    dois = []
+    postings = defaultdict(list)
+    years = []
+    for i, entry in enumerate(entries):
+        year = str(entry.get('year', 'Unknown'))
+        doi = normalize_text(entry.get('doi', ''))
+        fields = (
+            normalize_text(entry.get('title', '')),
+            doi,
+            year,
+            str(entry.get('author', '')),
+            json.dumps(entry, ensure_ascii=False),
+        )
+        values = []
+        for field in fields:
+            values.extend(blob.add(field))
+        records += _RECORD.pack(*values)
+        dois.append(doi)
+        for key in author_keys(entry.get('author', '')):
+            postings[key].append(i)
+        if years and years[-1][0] == year:
+            years[-1][2] += 1
+        else:
+            years.append([year, i, 1])
+
+    # DOI hash table with linear probing; slot value is record id + 1, 0 marks empty
+    capacity = 1
+    while capacity < 2 * max(1, len(entries)):
+        capacity *= 2
+    slots = [0] * capacity
+    for i, doi in enumerate(dois):
+        if not doi:
+            continue
+        slot = zlib.crc32(doi.encode('utf-8')) & (capacity - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (capacity - 1)
+        slots[slot] = i + 1
+    doi_table = struct.pack(f'<{capacity}I', *slots)
+
+    key_table = bytearray()
+    posting_ids = []
+    for key in sorted(postings):
+        offset, length = blob.add(key)
+        key_table += _KEY.pack(offset, length, len(posting_ids), len(postings[key]))
+        posting_ids.extend(postings[key])
+    postings_table = struct.pack(f'<{len(posting_ids)}I', *posting_ids)
+
+    year_table = bytearray()
+    for year, start, count in years:
+        offset, length = blob.add(year)
+        year_table += _YEAR.pack(offset, length, start, count)
+
+    mtime, size = 0.0, 0
+    if source and os.path.exists(source):
+        stat = os.stat(source)
+        mtime, size = stat.st_mtime, stat.st_size
+
+    records_off = _HEADER.size
+    doi_off = records_off + len(records)
+    keys_off = doi_off + len(doi_table)
+    postings_off = keys_off + len(key_table)
+    years_off = postings_off + len(postings_table)
+    strings_off = years_off + len(year_table)
+    header = _HEADER.pack(
+        MAGIC, VERSION, len(entries), capacity, len(postings), len(years), mtime, size,
+        records_off, doi_off, keys_off, postings_off, years_off, strings_off,
+    )
+
+    with atomic_writer(path, 'wb') as file:
+        for part in (header, records, doi_table, key_table, postings_table, year_table):
+            file.write(part)
+        for part in blob.parts:
+            file.write(part)
+    return path
+
+
+class BibIndex:
+    """Read-only view on an index file written by `build_index`."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as file:
+            self._mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (magic, version, self.count, self._capacity, self._n_keys, self._n_years, self.source_mtime,
+             self.source_size, self._records_off, self._doi_off, self._keys_off, self._postings_off,
+             self._years_off, self._strings_off) = _HEADER.unpack_from(self._mm, 0)
+        except struct.error:
+            self._mm.close()
+            raise ValueError(f"{path} is truncated")
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a publication index of version {VERSION}")
+        if self._strings_off > len(self._mm):
+            self._mm.close()
+            raise ValueError(f"{path} is truncated")
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _string(self, offset, length):
+        start = self._strings_off + offset
+        return self._mm[start:start + length].decode('utf-8')
+
+    def _field(self, record_id, field):
+        values = _RECORD.unpack_from(self._mm, self._records_off + record_id * _RECORD.size)
+        i = _FIELDS.index(field)
+        return self._string(values[2 * i], values[2 * i + 1])
+
+    def title(self, record_id):
+        """Normalized title of a record."""
+        return self._field(record_id, 'title')
+
+    def doi(self, record_id):
+        """Normalized DOI of a record."""
+        return self._field(record_id, 'doi')
+
+    def record(self, record_id):
+        return json.loads(self._field(record_id, 'payload'))
+
+    def normalized(self, record_ids=None):
+        """Returns normalized DOIs and titles in the layout of `pub_compare.normalize_records`."""
+        record_ids = range(self.count) if record_ids is None else record_ids
+        return [self.doi(i) for i in record_ids], [self.title(i) for i in record_ids]
+
+    def _year_entry(self, i):
+        offset, length, start, count = _YEAR.unpack_from(self._mm, self._years_off + i * _YEAR.size)
+        return self._string(offset, length), start, count
+
+    def years(self):
+        return [self._year_entry(i)[0] for i in range(self._n_years)]
+
+    def year_range(self, year):
+        """Record ids of one year as a range (empty if the year is not indexed)."""
+        year_keys = self.years()
+        i = bisect.bisect_left(year_keys, str(year))
+        if i < len(year_keys) and year_keys[i] == str(year):
+            _, start, count = self._year_entry(i)
+            return range(start, start + count)
+        return range(0)
+
+    def lookup_doi(self, doi):
+        """Returns the record id with exactly this DOI (after normalization) or None."""
+        doi = normalize_text(doi)
+        if not doi:
+            return None
+        mask = self._capacity - 1
+        slot = zlib.crc32(doi.encode('utf-8')) & mask
+        while True:
+            (value,) = _SLOT.unpack_from(self._mm, self._doi_off + slot * _SLOT.size)
+            if not value:
+                return None
+            if self.doi(value - 1) == doi:
+                return value - 1
+            slot = (slot + 1) & mask
+
+    def lookup_author(self, last_name):
+        """Record ids of all entries listing an author with this last name."""
+        parts = normalize_name(last_name).split()
+        if not parts:
+            return []
+        key = parts[-1]
+        lo, hi = 0, self._n_keys
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset, length, start, count = _KEY.unpack_from(self._mm, self._keys_off + mid * _KEY.size)
+            mid_key = self._string(offset, length)
+            if mid_key == key:
+                return list(struct.unpack_from(f'<{count}I', self._mm, self._postings_off + start * 4))
+            if mid_key < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return []
+
+    def publications_by_year(self):
+        """Decodes the whole library into the {year: [entry, ...]} layout used by the app."""
+        publications = defaultdict(list)
+        for i in range(self._n_years):
+            year, start, count = self._year_entry(i)
+            publications[year] = [self.record(record_id) for record_id in range(start, start + count)]
+        return publications
+
+
+def open_index_for(bib_path):
+    """
+    Returns the index of `bib_path` if one exists and matches the file, else
+    None. A corrupt or unreadable index also gives None, so it is rebuilt.
+    """
+    path = index_path_for(bib_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        index = BibIndex(path)
+    except (ValueError, OSError):
+        logger.warning(f"Ignoring unreadable index {path}")
+        return None
+    stat = os.stat(bib_path)
+    if index.source_mtime != stat.st_mtime or index.source_size != stat.st_size:
+        index.close()
+        return None
+    return index
+
+
+def main():
+    from bibtexparser.bparser import BibTexParser
+
+    for bib_path in sys.argv[1:]:
+        with open(bib_path, 'r', encoding='utf-8') as file:
+            entries = BibTexParser(common_strings=True).parse(file.read()).entries
+        path = build_index(entries, index_path_for(bib_path), source=bib_path)
+        print(f"Indexed {len(entries)} entries from {bib_path} into {path} ({os.path.getsize(path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Streaming export of publication records to BibTeX, CSV and JSON Lines.
+
+Every writer consumes the records one chunk at a time and writes into a
+temporary file next to the target, which is renamed over the target only
+after the last record was written. A cancelled or failed export therefore
+leaves the previous file untouched, and readers never see a half-written
+file. Records are plain dicts (e.g. `DataFrame.to_dict('records')`); NaN
+and other non-string values are converted on the fly.
+
+    python exporter.py crawled_publications.csv missing.bib missing.jsonl
+"""
+import csv
+import json
+import math
+import sys
+from itertools import islice
+
+from bibtexparser.bibdatabase import BibDatabase
+from bibtexparser.bwriter import BibTexWriter
+
+from atomic_file import atomic_writer
+from jobs import check_cancelled
+from metrics import metrics
+
+BIBTEX_CHUNK = 500
+FORMATS = ('bib', 'csv', 'jsonl')
+
+
+def _text(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    # Integer columns with gaps come out of pandas as floats (2020.0)
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return value if isinstance(value, str) else str(value)
+
+
+def clean_entry(record):
+    """Returns a BibTeX-ready copy of `record`: string values only, empty fields dropped."""
+    entry = {key: _text(value) for key, value in record.items()}
+    entry = {key: value for key, value in entry.items() if value != ''}
+    if 'ENTRYTYPE' not in entry:
+        raise KeyError(f"Missing 'ENTRYTYPE' in entry: {entry.get('ID', 'Unknown ID')}")
+    if 'ID' not in entry:
+        raise KeyError(f"Missing 'ID' in entry: {entry.get('ENTRYTYPE', 'Unknown ENTRYTYPE')}")
+    return entry
+
+
+def _chunks(records, size):
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def format_bibtex(records):
+    writer = BibTexWriter()
+    writer.indent = '    '
+    writer.order_entries_by = None
+    bib_db = BibDatabase()
+    bib_db.entries = [clean_entry(record) for record in records]
+    return writer.write(bib_db)
+
+
+def write_bibtex(records, path, cancel_token=None):
+    count = 0
+    with metrics.span('write.bibtex'), atomic_writer(path) as file:
+        for chunk in _chunks(records, BIBTEX_CHUNK):
+            check_cancelled(cancel_token)
+            file.write(format_bibtex(chunk))
+            count += len(chunk)
+    return count
+
+
+def write_csv(records, path, fieldnames=None, cancel_token=None):
+    """
+    Writes `records` as CSV. Without `fieldnames` the columns are taken from
+    the records, so an iterator is materialized first to collect them.
+    """
+    if fieldnames is None:
+        records = list(records)
+        fieldnames = list(dict.fromkeys(key for record in records for key in record))
+    count = 0
+    with metrics.span('write.csv'), atomic_writer(path, newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+        for chunk in _chunks(records, BIBTEX_CHUNK):
+            check_cancelled(cancel_token)
+            writer.writerows({key: _text(value) for key, value in record.items()} for record in chunk)
+            count += len(chunk)
+    return count
+
+
+def write_jsonl(records, path, cancel_token=None):
+    count = 0
+    with metrics.span('write.jsonl'), atomic_writer(path) as file:
+        for chunk in _chunks(records, BIBTEX_CHUNK):
+            check_cancelled(cancel_token)
+            file.writelines(json.dumps({key: _text(value) for key, value in record.items()}, ensure_ascii=False) + '\n'
+                            for record in chunk)
+            count += len(chunk)
+    return count
+
+
+_WRITERS = {'bib': write_bibtex, 'csv': write_csv, 'jsonl': write_jsonl}
+
+
+def export_publications(records, basename, formats=FORMATS, cancel_token=None):
+    """Writes `records` to <basename>.<format> for every format and returns {format: path}."""
+    records = list(records)
+    paths = {}
+    for fmt in formats:
+        path = f"{basename}.{fmt}"
+        _WRITERS[fmt](records, path, cancel_token=cancel_token)
+        paths[fmt] = path
+    return paths
+
+
+def bibtex_preview(records, limit):
+    """Formats only the first `limit` records; returns (text, number of records left out)."""
+    records = list(records)
+    return format_bibtex(records[:limit]), max(0, len(records) - limit)
+
+
+def main():
+    import pandas as pd
+
+    if len(sys.argv) < 3:
+        print("usage: python exporter.py <records.csv> <output.bib|.csv|.jsonl>...")
+        sys.exit(2)
+    records = pd.read_csv(sys.argv[1], dtype=str).to_dict('records')
+    for path in sys.argv[2:]:
+        count = _WRITERS[path.rsplit('.', 1)[-1]](records, path)
+        print(f"Wrote {count} records to {path}")
+
+
+if __name__ == "__main__":
+    main()
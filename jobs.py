@@ -0,0 +1,213 @@
+import itertools
+import logging
+import queue
+import threading
+import time
+import traceback
+
+logger = logging.getLogger(__name__)
+
+# Lower numbers run first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 10
+PRIORITY_BACKGROUND = 20
+
+
+class JobCancelled(BaseException):
+    """
+    Raised inside a job when its token was cancelled. Derives from
+    BaseException (like asyncio.CancelledError) so the fetchers' broad
+    `except Exception` error handling does not swallow it.
+    """
+
+
+class CancellationToken:
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise JobCancelled()
+
+
+def check_cancelled(token):
+    """Raises JobCancelled if `token` (which may be None) was cancelled."""
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+class Job:
+    _ids = itertools.count(1)
+
+    def __init__(self, name, func, args, kwargs, key, priority, group):
+        self.id = next(Job._ids)
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.key = key
+        self.priority = priority
+        self.group = group
+        self.token = CancellationToken()
+        self.status = 'pending'
+        self.error = None
+        self.result = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self._done = threading.Event()
+
+    @property
+    def active(self):
+        return self.status in ('pending', 'running')
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def wait(self, timeout=None):
+        """Blocks until the job finished, failed or was cancelled; False on timeout."""
+        return self._done.wait(timeout)
+
+
+def wait_for(jobs, cancel_token=None, poll=0.2):
+    """
+    Waits until all `jobs` (None entries are skipped) are finished. Returns
+    early, without raising, once `cancel_token` is cancelled.
+    """
+    for job in jobs:
+        while job is not None and not job.wait(poll):
+            if cancel_token is not None and cancel_token.cancelled:
+                return
+
+
+class JobScheduler:
+    """
+    Priority scheduler for background work with job identity and cancellation.
+
+    - `submit` returns the already pending or running job when one with the
+      same `key` exists, so repeated clicks do not start duplicate work.
+    - Jobs run in priority order (PRIORITY_INTERACTIVE before
+      PRIORITY_BACKGROUND), FIFO within a priority.
+    - Jobs of the same `group` run one at a time, so two crawls never write
+      the same files or result views concurrently.
+    - Every job gets a CancellationToken, passed to `func` as `cancel_token`.
+      A job cancelled while pending never starts.
+    - Listeners registered with `subscribe(callback)` are called with the job
+      on every status change, from the thread that changed it.
+    """
+
+    def __init__(self, max_workers=5):
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._busy_groups = set()
+        self._deferred = {}
+        self._listeners = []
+        self._workers = [threading.Thread(target=self._work, daemon=True) for _ in range(max_workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+        return callback
+
+    def _notify(self, job):
+        for callback in list(self._listeners):
+            try:
+                callback(job)
+            except Exception:
+                logger.exception("Error in job listener")
+
+    def submit(self, name, func, *args, key=None, priority=PRIORITY_NORMAL, group=None, **kwargs):
+        with self._lock:
+            if key is not None:
+                for job in self._jobs.values():
+                    if job.key == key and job.active:
+                        return job
+            job = Job(name, func, args, kwargs, key, priority, group)
+            self._jobs[job.id] = job
+            self._queue.put((priority, next(self._seq), job))
+        self._notify(job)
+        return job
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not job.active:
+                return False
+            job.token.cancel()
+            if job.status == 'pending':
+                job.status = 'cancelled'
+                job.finished = time.time()
+                job._done.set()
+        self._notify(job)
+        return True
+
+    def cancel_group(self, group):
+        for job in self.jobs():
+            if job.group == group and job.active:
+                self.cancel(job.id)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def forget_finished(self, keep=20):
+        """Drops all but the `keep` most recent finished jobs from the job list."""
+        with self._lock:
+            finished = [job for job in self._jobs.values() if not job.active]
+            for job in finished[:max(0, len(finished) - keep)]:
+                del self._jobs[job.id]
+
+    def _take(self, job):
+        # Decides under the lock whether a dequeued job may start now
+        with self._lock:
+            if job.status != 'pending':
+                return False
+            if job.group is not None:
+                if job.group in self._busy_groups:
+                    self._deferred.setdefault(job.group, []).append(job)
+                    return False
+                self._busy_groups.add(job.group)
+            job.status = 'running'
+            job.started = time.time()
+            return True
+
+    def _release(self, job):
+        with self._lock:
+            if job.group is None:
+                return
+            self._busy_groups.discard(job.group)
+            for deferred in self._deferred.pop(job.group, []):
+                self._queue.put((deferred.priority, next(self._seq), deferred))
+
+    def _work(self):
+        while True:
+            _, _, job = self._queue.get()
+            if not self._take(job):
+                continue
+            self._notify(job)
+            try:
+                job.result = job.func(*job.args, cancel_token=job.token, **job.kwargs)
+                job.status = 'cancelled' if job.token.cancelled else 'done'
+            except JobCancelled:
+                job.status = 'cancelled'
+            except Exception as e:
+                job.status = 'failed'
+                job.error = str(e)
+                logger.error(f"Job {job.name} failed:\n{traceback.format_exc()}")
+            finally:
+                job.finished = time.time()
+                job._done.set()
+                self._release(job)
+            self._notify(job)
@@ -0,0 +1,129 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+logger = logging.getLogger(__name__)
+
+# Set PUB_APP_METRICS=0 to switch the instrumentation off completely
+METRICS_ENABLED = os.environ.get('PUB_APP_METRICS', '1') != '0'
+METRICS_FILE = os.environ.get('PUB_APP_METRICS_FILE', 'publication_metrics.jsonl')
+
+# Shared no-op context manager handed out when metrics are disabled
+_NULL_SPAN = nullcontext()
+
+
+class Metrics:
+    """
+    Lightweight per-run timing and counter registry.
+
+    Spans are aggregated by name (e.g. "fetch.crossref", "compare"), so every
+    stage reports its call count, total and maximum duration. Counters track
+    requests and bytes per source, cache lookups track hits and misses.
+    When disabled, every method returns immediately and `span` hands out a
+    shared null context, so instrumented code pays no measurable cost.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.spans = defaultdict(lambda: {'calls': 0, 'total': 0.0, 'max': 0.0})
+            self.counters = defaultdict(int)
+            self.caches = defaultdict(lambda: {'hits': 0, 'misses': 0})
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._span(name)
+
+    @contextmanager
+    def _span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stats = self.spans[name]
+                stats['calls'] += 1
+                stats['total'] += elapsed
+                stats['max'] = max(stats['max'], elapsed)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] += n
+
+    def record_request(self, source, response=None, nbytes=None):
+        """Counts one HTTP request for `source` and the size of its body."""
+        if not self.enabled:
+            return
+        if nbytes is None and response is not None:
+            nbytes = len(response.content)
+        with self._lock:
+            self.counters[f"requests.{source}"] += 1
+            self.counters[f"bytes.{source}"] += nbytes or 0
+
+    def cache_lookup(self, cache, hit):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.caches[cache]['hits' if hit else 'misses'] += 1
+
+    def snapshot(self, params=None):
+        with self._lock:
+            caches = {}
+            for name, stats in self.caches.items():
+                lookups = stats['hits'] + stats['misses']
+                caches[name] = dict(stats, hit_rate=stats['hits'] / lookups if lookups else 0.0)
+            return {
+                'started': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started)),
+                'wall_time': time.time() - self.started,
+                'params': params or {},
+                'spans': {name: dict(stats) for name, stats in self.spans.items()},
+                'counters': dict(self.counters),
+                'caches': caches,
+            }
+
+    def summary_table(self, snapshot=None):
+        snapshot = snapshot or self.snapshot()
+        lines = [f"{'Stage':<32}{'Calls':>8}{'Total [s]':>12}{'Max [s]':>12}"]
+        lines.append('-' * len(lines[0]))
+        for name, stats in sorted(snapshot['spans'].items()):
+            lines.append(f"{name:<32}{stats['calls']:>8}{stats['total']:>12.3f}{stats['max']:>12.3f}")
+        for name, value in sorted(snapshot['counters'].items()):
+            lines.append(f"{name:<32}{value:>8}")
+        for name, stats in sorted(snapshot['caches'].items()):
+            lines.append(f"cache.{name:<26}{stats['hits']:>8} hits {stats['misses']:>6} misses ({stats['hit_rate']:.0%})")
+        return '\n'.join(lines)
+
+    def report(self, params=None, filename=METRICS_FILE):
+        """
+        Logs the summary table, appends the run as one JSON line to `filename`
+        and starts a fresh run. Returns the summary table (empty if disabled).
+        """
+        if not self.enabled:
+            return ''
+        snapshot = self.snapshot(params)
+        table = self.summary_table(snapshot)
+        logger.info("Run metrics:\n%s", table)
+        try:
+            with open(filename, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(snapshot) + '\n')
+        except OSError:
+            logger.exception("Could not write metrics to %s", filename)
+        self.reset()
+        return table
+
+
+# Process-wide registry used by the app and the helper modules
+metrics = Metrics(enabled=METRICS_ENABLED)
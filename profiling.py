@@ -0,0 +1,126 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Set PUB_APP_PROFILE=1 to profile every run, PUB_APP_PROFILER=sampling to use the stack sampler
+PROFILE_ENABLED = os.environ.get('PUB_APP_PROFILE', '0') == '1'
+PROFILER = os.environ.get('PUB_APP_PROFILER', 'cprofile')
+PROFILE_DIR = os.environ.get('PUB_APP_PROFILE_DIR', 'profiles')
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread at a fixed interval.
+
+    The result is written in the collapsed "frame;frame;frame count" format,
+    which flamegraph.pl and speedscope read directly. Unlike cProfile, the
+    overhead does not grow with the number of function calls.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, filename):
+        with open(filename, 'w', encoding='utf-8') as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+def _run_directory(name):
+    directory = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_{name}")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+@contextmanager
+def profile_run(name, params, enabled=None, profiler=None):
+    """
+    Profiles the enclosed block when enabled and stores the artifacts in
+    profiles/<timestamp>_<name>/: the cProfile dump and a text summary (or
+    collapsed sampled stacks), the tracemalloc high-water mark with the top
+    allocation sites, and the run parameters. `params` is read on exit, so
+    the block may still add to it.
+    """
+    if enabled is None:
+        enabled = PROFILE_ENABLED
+    if not enabled:
+        yield None
+        return
+
+    profiler = profiler or PROFILER
+    directory = _run_directory(name)
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+
+    if profiler == 'sampling':
+        sampler = StackSampler(threading.get_ident())
+        sampler.start()
+    else:
+        sampler = cProfile.Profile()
+        sampler.enable()
+
+    start = time.perf_counter()
+    try:
+        yield directory
+    finally:
+        elapsed = time.perf_counter() - start
+        if profiler == 'sampling':
+            sampler.stop()
+            sampler.write(os.path.join(directory, 'stacks.txt'))
+        else:
+            sampler.disable()
+            sampler.dump_stats(os.path.join(directory, 'profile.prof'))
+            summary = io.StringIO()
+            pstats.Stats(sampler, stream=summary).sort_stats('cumulative').print_stats(50)
+            with open(os.path.join(directory, 'profile.txt'), 'w', encoding='utf-8') as file:
+                file.write(summary.getvalue())
+
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics('lineno')[:20]
+        if started_tracing:
+            tracemalloc.stop()
+        memory = {
+            'current_bytes': current,
+            'peak_bytes': peak,
+            'top_allocations': [{'site': str(stat.traceback), 'size': stat.size, 'count': stat.count} for stat in top],
+        }
+        with open(os.path.join(directory, 'memory.json'), 'w', encoding='utf-8') as file:
+            json.dump(memory, file, indent=2)
+        with open(os.path.join(directory, 'params.json'), 'w', encoding='utf-8') as file:
+            json.dump({'name': name, 'profiler': profiler, 'elapsed': elapsed, 'params': params}, file, indent=2, default=str)
+        logger.info(f"Profile for {name} saved to {directory} ({elapsed:.2f}s, peak memory {peak / 2**20:.1f} MiB)")
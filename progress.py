@@ -0,0 +1,149 @@
+import json
+import queue
+import threading
+import time
+
+# Queue marker asking the draining thread to clear the per-source counters
+_RESET = object()
+
+
+class ProgressEvent:
+    """One progress update; `source` with `done`/`total` feeds the per-source counters."""
+
+    __slots__ = ('time', 'message', 'source', 'done', 'total', 'finished')
+
+    def __init__(self, message, source=None, done=None, total=None, finished=False):
+        self.time = time.time()
+        self.message = message
+        self.source = source
+        self.done = done
+        self.total = total
+        self.finished = finished
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ProgressTracker:
+    """Keeps per-source counters and estimates the remaining time from the rate so far."""
+
+    def __init__(self):
+        self.sources = {}
+
+    def update(self, event):
+        if event.source is None:
+            return
+        state = self.sources.setdefault(event.source, {'started': event.time, 'done': 0, 'total': None, 'finished': False})
+        if event.done is not None:
+            state['done'] = event.done
+        if event.total is not None:
+            state['total'] = event.total
+        state['finished'] = event.finished
+        state['updated'] = event.time
+
+    def eta(self, source):
+        state = self.sources[source]
+        if state['finished'] or not state['total'] or not state['done']:
+            return None
+        elapsed = state['updated'] - state['started']
+        return elapsed / state['done'] * max(0, state['total'] - state['done'])
+
+    def summary(self):
+        parts = []
+        for source, state in self.sources.items():
+            text = f"{source}: {state['done']}"
+            if state['total']:
+                text += f"/{state['total']}"
+            if state['finished']:
+                text += " done"
+            else:
+                eta = self.eta(source)
+                if eta is not None:
+                    text += f" (ETA {eta:.0f}s)"
+            parts.append(text)
+        return ' | '.join(parts)
+
+    def reset(self):
+        self.sources.clear()
+
+
+class ProgressBus:
+    """
+    Thread-safe progress channel.
+
+    Workers `publish` events into a queue without touching any consumer.
+    Whoever owns the bus calls `drain` at a fixed tick (the GUI from the Tk
+    event loop, scripts via `start_pump`); every subscriber then receives all
+    events since the last tick as one batch, so a burst of messages costs one
+    UI update instead of one per message.
+    """
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self.tracker = ProgressTracker()
+
+    def subscribe(self, callback):
+        """Registers `callback(events, tracker)`; returns it for later `unsubscribe`."""
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers.remove(callback)
+
+    def publish(self, message, source=None, done=None, total=None, finished=False):
+        self._queue.put(ProgressEvent(message, source, done, total, finished))
+
+    def reset_counters(self):
+        """Clears the per-source counters before the next queued event (e.g. when a new run starts)."""
+        self._queue.put(_RESET)
+
+    def drain(self):
+        events = []
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if event is _RESET:
+                self.tracker.reset()
+                continue
+            self.tracker.update(event)
+            events.append(event)
+        if not events:
+            return events
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(events, self.tracker)
+        return events
+
+    def start_pump(self, interval=0.2):
+        """Drains the bus from a daemon thread, for consumers without an event loop."""
+        def pump():
+            while True:
+                time.sleep(interval)
+                self.drain()
+        thread = threading.Thread(target=pump, daemon=True)
+        thread.start()
+        return thread
+
+
+def print_subscriber(events, tracker):
+    for event in events:
+        print(event.message)
+
+
+class JsonLinesSubscriber:
+    """Appends every event as one JSON line to `filename`."""
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def __call__(self, events, tracker):
+        with open(self.filename, 'a', encoding='utf-8') as file:
+            for event in events:
+                file.write(json.dumps(event.as_dict()) + '\n')
@@ -0,0 +1,208 @@
+"""
+Compact binary cache of the publications by year.
+
+Replaces the indented publications_cache.json written by tu_biblio_api. The
+file consists of
+
+    header        magic, version, flags, number of years
+    directory     per year: year, block offset, block length, entry count
+    blocks        one block per year, zlib-compressed unless disabled
+
+and every block is self-contained:
+
+    strings       count, then all distinct strings of the year (field names,
+                  authors, publishers, ...) joined by NUL
+    records       the number of fields of every entry, followed by the
+                  (name, value) pairs of string ids of all entries
+
+so repeated authors and field names are stored once per year, and
+`load_year` reads and decodes a single block without touching the others.
+
+    python pub_cache.py publications_cache.json publications_cache.pubc
+"""
+import array
+import json
+import os
+import struct
+import sys
+import zlib
+
+from atomic_file import atomic_writer
+
+MAGIC = b'TKPUBCCH'
+VERSION = 1
+FLAG_ZLIB = 1
+
+_HEADER = struct.Struct('<8sHHI')   # magic, version, flags, years
+_DIRECTORY = struct.Struct('<HQQI')  # year length (the year follows), block offset, block length, entries
+_COUNT = struct.Struct('<I')
+
+
+def _encode_block(entries):
+    strings = {}
+    counts = array.array('I')
+    ids = array.array('I')
+    for entry in entries:
+        counts.append(len(entry))
+        for name, value in entry.items():
+            if not isinstance(value, str):
+                raise TypeError(f"Cache values must be strings, got {type(value).__name__} for '{name}'")
+            for text in (name, value):
+                if '\0' in text:
+                    raise ValueError(f"NUL character in cached field '{name}'")
+                ids.append(strings.setdefault(text, len(strings)))
+    blob = '\0'.join(strings).encode('utf-8')
+    return (_COUNT.pack(len(strings)) + _COUNT.pack(len(blob)) + _COUNT.pack(len(counts))
+            + blob + counts.tobytes() + ids.tobytes())
+
+
+def _decode_block(data):
+    n_strings, blob_size, n_entries = struct.unpack_from('<III', data, 0)
+    start = 3 * _COUNT.size
+    strings = data[start:start + blob_size].decode('utf-8').split('\0') if n_strings else []
+    counts = array.array('I')
+    counts.frombytes(data[start + blob_size:start + blob_size + 4 * n_entries])
+    ids = array.array('I')
+    ids.frombytes(data[start + blob_size + 4 * n_entries:])
+    # Resolve all ids at once, then cut the flat name/value list into entries
+    texts = list(map(strings.__getitem__, ids))
+    entries = []
+    i = 0
+    for n_fields in counts:
+        end = i + 2 * n_fields
+        entries.append(dict(zip(texts[i:end:2], texts[i + 1:end:2])))
+        i = end
+    return entries
+
+
+def _pack_block(entries, compress):
+    block = _encode_block(entries)
+    return zlib.compress(block, 1) if compress else block
+
+
+def _write_blocks(path, blocks, flags):
+    offset = _HEADER.size + sum(_DIRECTORY.size + len(year) for year, _, _ in blocks)
+    directory = bytearray()
+    for year, block, count in blocks:
+        directory += _DIRECTORY.pack(len(year), offset, len(block), count) + year
+        offset += len(block)
+
+    with atomic_writer(path, 'wb') as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, flags, len(blocks)))
+        file.write(directory)
+        for _, block, _ in blocks:
+            file.write(block)
+    return path
+
+
+def write_cache(data, path, compress=True):
+    """Writes {year: [entry dict]} to `path` (atomically) and returns the path."""
+    blocks = [(str(year).encode('utf-8'), _pack_block(entries, compress), len(entries)) for year, entries in data.items()]
+    return _write_blocks(path, blocks, FLAG_ZLIB if compress else 0)
+
+
+def update_cache(path, changed, order=None, compress=True):
+    """
+    Replaces the years in `changed` ({year: [entry dict]}, an empty list
+    drops the year) and copies the blocks of all other years without
+    decoding them. `order` optionally gives the order of the years.
+    """
+    changed = {str(year): entries for year, entries in changed.items()}
+    if not os.path.exists(path):
+        years = [year for year in order if year in changed] if order is not None else list(changed)
+        return write_cache({year: changed[year] for year in years if changed[year]}, path, compress)
+
+    flags = FLAG_ZLIB if compress else 0
+    with PubCache(path) as cache:
+        years = list(order) if order is not None else cache.years() + [year for year in changed if year not in cache.directory]
+        blocks = []
+        for year in years:
+            if year in changed:
+                entries = changed[year]
+                if entries:
+                    blocks.append((year.encode('utf-8'), _pack_block(entries, compress), len(entries)))
+            elif year in cache.directory:
+                if cache.flags == flags:
+                    block = cache.raw_block(year)
+                else:
+                    block = _pack_block(cache.load_year(year), compress)
+                blocks.append((year.encode('utf-8'), block, cache.count(year)))
+    return _write_blocks(path, blocks, flags)
+
+
+class PubCache:
+    """Reader for a cache written by `write_cache`; only the directory is read on open."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        magic, version, self.flags, n_years = _HEADER.unpack(self._file.read(_HEADER.size))
+        if magic != MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} is not a publication cache")
+        if version != VERSION:
+            self._file.close()
+            raise ValueError(f"Unsupported publication cache version {version} in {path}")
+        self.directory = {}
+        for _ in range(n_years):
+            year_length, offset, length, count = _DIRECTORY.unpack(self._file.read(_DIRECTORY.size))
+            year = self._file.read(year_length).decode('utf-8')
+            self.directory[year] = (offset, length, count)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def years(self):
+        return list(self.directory)
+
+    def count(self, year):
+        return self.directory[str(year)][2] if str(year) in self.directory else 0
+
+    def raw_block(self, year):
+        offset, length, _ = self.directory[str(year)]
+        self._file.seek(offset)
+        return self._file.read(length)
+
+    def load_year(self, year):
+        """Returns the entries of one year ([] if the year is not cached)."""
+        if str(year) not in self.directory:
+            return []
+        block = self.raw_block(year)
+        if self.flags & FLAG_ZLIB:
+            block = zlib.decompress(block)
+        return _decode_block(block)
+
+    def load(self):
+        return {year: self.load_year(year) for year in self.directory}
+
+
+def load_cache(path):
+    with PubCache(path) as cache:
+        return cache.load()
+
+
+def load_year(path, year):
+    with PubCache(path) as cache:
+        return cache.load_year(year)
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("usage: python pub_cache.py <publications_cache.json> <output.pubc>")
+        sys.exit(2)
+    source, target = sys.argv[1:]
+    with open(source, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    write_cache(data, target)
+    print(f"Wrote {sum(len(entries) for entries in data.values())} entries in {len(data)} years to {target} "
+          f"({os.path.getsize(target)} bytes, JSON: {os.path.getsize(source)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
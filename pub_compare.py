@@ -0,0 +1,386 @@
+"""
+Similarity scoring between local and crawled publications.
+
+A crawled record is "missing" when no local record has a similar DOI or
+title, a local record is "extra" when no crawled record is similar to it.
+Scores are computed as best-match maxima per record with rapidfuzz's
+vectorised `cdist`; large comparisons are sharded over a process pool that
+reads the normalized local index from shared memory instead of receiving
+it pickled with every task.
+
+Together with the scores, the position of the best candidate is kept, so
+`classify` can be rerun with other thresholds without recomputing any
+similarity, and `match_reasons` can tell why a record did or did not match.
+`ScoreCache` keeps the scores of recent comparisons for reuse.
+
+Standalone use for whole-library audits:
+    python pub_compare.py TK_Publikationen_Komplett.bib crawled_publications.csv --workers 32
+"""
+import argparse
+import hashlib
+import logging
+import multiprocessing
+import os
+from collections import OrderedDict
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from jobs import check_cancelled
+
+logger = logging.getLogger(__name__)
+
+DOI_THRESHOLD = 90
+TITLE_THRESHOLD = 80
+
+# Comparisons with at least this many record pairs use the process pool
+PARALLEL_MIN_PAIRS = int(os.environ.get('PUB_APP_PARALLEL_MIN_PAIRS', 5_000_000))
+# Number of worker processes; 0 picks os.cpu_count()
+COMPARE_WORKERS = int(os.environ.get('PUB_APP_COMPARE_WORKERS', 0))
+# Workers are never forked from the (threaded) GUI process: a lock held by another thread at fork time stays locked
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+# How often a parallel comparison checks its cancellation token
+CANCEL_POLL_SECONDS = 0.1
+# Upper bound for the score matrix computed in one step (rows x local records)
+CHUNK_CELLS = 4_000_000
+# Number of comparisons kept by ScoreCache, and an optional directory to persist them
+SCORE_CACHE_SIZE = 8
+SCORE_CACHE_DIR = os.environ.get('PUB_APP_SCORE_CACHE', '')
+
+# Separator for the packed string index; normalization strips it from the data
+_SEP = '\x00'
+
+
+def normalize_text(text):
+    if not isinstance(text, str):
+        text = str(text)
+    text = re.sub(r'{\\[a-z]{1,2}}', '', text)
+    text = re.sub(r'{\\\w+\s*}', '', text)
+    text = re.sub(r'[^\w\s]', '', text.lower())
+    return text
+
+
+def normalize_records(records):
+    """Returns the normalized DOIs and titles of `records` (a list of dicts) as two lists."""
+    dois = [normalize_text(pub.get('doi', '')) for pub in records]
+    titles = [normalize_text(pub.get('title', '')) for pub in records]
+    return dois, titles
+
+
+class Scores:
+    """
+    Best DOI and title similarity per crawled and per local record, and the
+    position of the best candidate on the other side (-1 if there is none).
+    """
+
+    FIELDS = ('crawled_doi', 'crawled_title', 'local_doi', 'local_title',
+              'crawled_doi_match', 'crawled_title_match', 'local_doi_match', 'local_title_match')
+
+    def __init__(self, crawled_doi, crawled_title, local_doi, local_title,
+                 crawled_doi_match=None, crawled_title_match=None, local_doi_match=None, local_title_match=None):
+        self.crawled_doi = crawled_doi
+        self.crawled_title = crawled_title
+        self.local_doi = local_doi
+        self.local_title = local_title
+        self.crawled_doi_match = _no_match(crawled_doi) if crawled_doi_match is None else crawled_doi_match
+        self.crawled_title_match = _no_match(crawled_title) if crawled_title_match is None else crawled_title_match
+        self.local_doi_match = _no_match(local_doi) if local_doi_match is None else local_doi_match
+        self.local_title_match = _no_match(local_title) if local_title_match is None else local_title_match
+
+    def arrays(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+
+def _no_match(scores):
+    return np.full(len(scores), -1, dtype=np.int64)
+
+
+def _best_rows(matrix, offset=0):
+    # Best column per row; rows without any similarity get -1
+    best = matrix.argmax(axis=1)
+    scores = matrix[np.arange(len(best)), best]
+    return scores, np.where(scores > 0, best + offset, -1)
+
+
+def _merge_best(scores, matches, new_scores, new_matches):
+    # Keeps the earlier candidate on ties, so shards give the same result as one block
+    better = new_scores > scores
+    scores[better] = new_scores[better]
+    matches[better] = new_matches[better]
+
+
+def score_block(crawled_dois, crawled_titles, local_dois, local_titles, cancel_token=None):
+    """
+    Scores a block of crawled records against all local records.
+
+    Returns a Scores with the per-row maxima for the crawled records, the
+    per-column maxima for the local records and the positions of the best
+    candidates (crawled positions relative to this block). The DOI maximum
+    is only meaningful for records that have a DOI themselves and is left
+    at 0 otherwise.
+    """
+    n_crawled, n_local = len(crawled_titles), len(local_titles)
+    scores = Scores(np.zeros(n_crawled), np.zeros(n_crawled), np.zeros(n_local), np.zeros(n_local))
+    if not n_crawled or not n_local:
+        return scores
+
+    rows = max(1, CHUNK_CELLS // n_local)
+    for start in range(0, n_crawled, rows):
+        check_cancelled(cancel_token)
+        stop = min(start + rows, n_crawled)
+        doi_matrix = process.cdist(crawled_dois[start:stop], local_dois, scorer=fuzz.ratio, dtype=np.float64, workers=1)
+        title_matrix = process.cdist(crawled_titles[start:stop], local_titles, scorer=fuzz.ratio, dtype=np.float64, workers=1)
+        scores.crawled_doi[start:stop], scores.crawled_doi_match[start:stop] = _best_rows(doi_matrix)
+        scores.crawled_title[start:stop], scores.crawled_title_match[start:stop] = _best_rows(title_matrix)
+        _merge_best(scores.local_doi, scores.local_doi_match, *_best_rows(doi_matrix.T, start))
+        _merge_best(scores.local_title, scores.local_title_match, *_best_rows(title_matrix.T, start))
+
+    no_doi = [not doi for doi in crawled_dois]
+    scores.crawled_doi[no_doi] = 0
+    scores.crawled_doi_match[no_doi] = -1
+    no_doi = [not doi for doi in local_dois]
+    scores.local_doi[no_doi] = 0
+    scores.local_doi_match[no_doi] = -1
+    return scores
+
+
+# ---------------------------------------------------------------------------
+# Process pool with a shared local index
+# ---------------------------------------------------------------------------
+
+def _pack(dois, titles):
+    return (_SEP.join(dois) + _SEP + _SEP.join(titles)).encode('utf-8')
+
+
+def _unpack(data, count):
+    if not count:
+        return [], []
+    parts = data.decode('utf-8').split(_SEP)
+    return parts[:count], parts[count:]
+
+
+# Local index of a worker process, decoded once by _init_worker
+_worker_index = None
+
+
+def _init_worker(shm_name, size, count):
+    global _worker_index
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        _worker_index = _unpack(bytes(shm.buf[:size]), count)
+    finally:
+        shm.close()
+
+
+def _init_worker_from_index(index_path):
+    # Every worker maps the same index file, so the pages are shared through the page cache
+    global _worker_index
+    from bib_index import BibIndex
+
+    with BibIndex(index_path) as index:
+        _worker_index = index.normalized()
+
+
+def _score_shard(start, crawled_dois, crawled_titles):
+    local_dois, local_titles = _worker_index
+    return start, score_block(crawled_dois, crawled_titles, local_dois, local_titles).arrays()
+
+
+def _score_parallel(local, crawled, workers, index_path=None, cancel_token=None):
+    local_dois, local_titles = local
+    crawled_dois, crawled_titles = crawled
+    n_crawled, n_local = len(crawled_titles), len(local_titles)
+
+    shm = None
+    if index_path:
+        initializer, initargs = _init_worker_from_index, (index_path,)
+    else:
+        data = _pack(local_dois, local_titles)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+        shm.buf[:len(data)] = data
+        initializer, initargs = _init_worker, (shm.name, len(data), n_local)
+    try:
+        scores = Scores(np.zeros(n_crawled), np.zeros(n_crawled), np.zeros(n_local), np.zeros(n_local))
+
+        # A few shards per worker keep the pool busy when shards finish unevenly
+        shard_size = max(1, -(-n_crawled // (workers * 4)))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD),
+                                 initializer=initializer, initargs=initargs) as pool:
+            futures = [
+                pool.submit(_score_shard, start, crawled_dois[start:start + shard_size], crawled_titles[start:start + shard_size])
+                for start in range(0, n_crawled, shard_size)
+            ]
+            for future in futures:
+                while cancel_token is not None and not future.done():
+                    if cancel_token.cancelled:
+                        # Drops the shards not started yet; only the running ones are waited for
+                        pool.shutdown(cancel_futures=True)
+                        check_cancelled(cancel_token)
+                    wait([future], timeout=CANCEL_POLL_SECONDS)
+                start, shard = future.result()
+                stop = start + len(shard['crawled_title'])
+                for name in ('crawled_doi', 'crawled_title', 'crawled_doi_match', 'crawled_title_match'):
+                    getattr(scores, name)[start:stop] = shard[name]
+                for field in ('doi', 'title'):
+                    matches = shard[f'local_{field}_match']
+                    _merge_best(getattr(scores, f'local_{field}'), getattr(scores, f'local_{field}_match'),
+                                shard[f'local_{field}'], np.where(matches >= 0, matches + start, -1))
+        return scores
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+
+def score_publications(local, crawled, workers=None, index_path=None, cancel_token=None):
+    """
+    Computes the best-match scores between normalized `local` and `crawled`
+    records (both as returned by `normalize_records`). With `workers=None`,
+    the process pool is used once the comparison reaches PARALLEL_MIN_PAIRS.
+    If `local` is the whole library of a bib_index file, pass its path as
+    `index_path` and the workers map the index instead of a shared copy.
+    A cancelled `cancel_token` stops the scoring between chunks or shards.
+    """
+    pairs = len(local[1]) * len(crawled[1])
+    if workers is None:
+        workers = (COMPARE_WORKERS or os.cpu_count() or 1) if pairs >= PARALLEL_MIN_PAIRS else 1
+
+    start = time.perf_counter()
+    if workers > 1 and len(crawled[1]) > 1:
+        scores = _score_parallel(local, crawled, workers, index_path, cancel_token)
+    else:
+        workers = 1
+        scores = score_block(crawled[0], crawled[1], local[0], local[1], cancel_token)
+    logger.info(f"Scored {pairs} pairs with {workers} process(es) in {time.perf_counter() - start:.2f}s")
+    return scores
+
+
+def classify(scores, doi_threshold=DOI_THRESHOLD, title_threshold=TITLE_THRESHOLD):
+    """Returns the positions of missing crawled records and of extra local records."""
+    crawled_matched = (scores.crawled_doi >= doi_threshold) | (scores.crawled_title >= title_threshold)
+    local_matched = (scores.local_doi >= doi_threshold) | (scores.local_title >= title_threshold)
+    return np.flatnonzero(~crawled_matched), np.flatnonzero(~local_matched)
+
+
+def match_reasons(scores, side, positions, doi_threshold=DOI_THRESHOLD, title_threshold=TITLE_THRESHOLD):
+    """
+    Explains the classification of the records at `positions` on `side`
+    ('crawled' or 'local'). Returns (reason, best candidate position) pairs,
+    with -1 as position when no candidate has any similarity.
+    """
+    doi, title = getattr(scores, f'{side}_doi'), getattr(scores, f'{side}_title')
+    doi_match, title_match = getattr(scores, f'{side}_doi_match'), getattr(scores, f'{side}_title_match')
+    reasons = []
+    for i in positions:
+        if doi[i] >= doi_threshold:
+            reasons.append((f"DOI {doi[i]:.0f} >= {doi_threshold}", int(doi_match[i])))
+        elif title[i] >= title_threshold:
+            reasons.append((f"title {title[i]:.0f} >= {title_threshold}", int(title_match[i])))
+        else:
+            doi_text = f"DOI {doi[i]:.0f} < {doi_threshold}" if doi_match[i] >= 0 else "no DOI match"
+            reasons.append((f"{doi_text}, title {title[i]:.0f} < {title_threshold}", int(title_match[i])))
+    return reasons
+
+
+class ScoreCache:
+    """
+    Keeps the Scores of the most recent comparisons, keyed by a hash of the
+    normalized inputs, so repeating a comparison costs no similarity
+    computation. With a `directory`, scores are also stored as .npz files
+    and survive restarts.
+    """
+
+    def __init__(self, size=SCORE_CACHE_SIZE, directory=SCORE_CACHE_DIR or None):
+        self.size = size
+        self.directory = directory
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def key(local, crawled):
+        digest = hashlib.sha1(_pack(*local))
+        digest.update(b'\x01')
+        digest.update(_pack(*crawled))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'scores_{key}.npz')
+
+    def get(self, key):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        if self.directory and os.path.exists(self._path(key)):
+            with np.load(self._path(key)) as data:
+                scores = Scores(**{name: data[name] for name in Scores.FIELDS})
+            self._remember(key, scores)
+            return scores
+        return None
+
+    def _remember(self, key, scores):
+        self._entries[key] = scores
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def put(self, key, scores):
+        self._remember(key, scores)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            np.savez(self._path(key), **scores.arrays())
+
+    def score(self, local, crawled, **kwargs):
+        """Returns cached scores for these inputs or computes them with `score_publications`."""
+        key = self.key(local, crawled)
+        scores = self.get(key)
+        if scores is None:
+            scores = score_publications(local, crawled, **kwargs)
+            self.put(key, scores)
+        else:
+            logger.info(f"Reused cached scores for {len(local[1])} x {len(crawled[1])} records")
+        return scores
+
+
+def main():
+    import pandas as pd
+    from bibtexparser.bparser import BibTexParser
+
+    parser = argparse.ArgumentParser(description="Compare a local BibTeX library with crawled publications.")
+    parser.add_argument('local', help="local BibTeX file or its .idx index (see bib_index.py)")
+    parser.add_argument('crawled', help="crawled publications CSV")
+    parser.add_argument('--workers', type=int, default=COMPARE_WORKERS or os.cpu_count())
+    parser.add_argument('--missing', default='missing_publications.csv')
+    parser.add_argument('--extra', default='extra_publications.csv')
+    parser.add_argument('--doi-threshold', type=float, default=DOI_THRESHOLD)
+    parser.add_argument('--title-threshold', type=float, default=TITLE_THRESHOLD)
+    args = parser.parse_args()
+
+    crawled_data = pd.read_csv(args.crawled, dtype=str).fillna('')
+    crawled = normalize_records(crawled_data.to_dict('records'))
+    if args.local.endswith('.idx'):
+        from bib_index import BibIndex
+
+        with BibIndex(args.local) as index:
+            local = index.normalized()
+            scores = score_publications(local, crawled, workers=args.workers, index_path=args.local)
+            local_data = pd.DataFrame([index.record(i) for i in range(len(index))])
+    else:
+        with open(args.local, 'r', encoding='utf-8') as file:
+            local_data = pd.DataFrame(BibTexParser(common_strings=True).parse(file.read()).entries)
+        scores = score_publications(normalize_records(local_data.to_dict('records')), crawled, workers=args.workers)
+    missing_idx, extra_idx = classify(scores, args.doi_threshold, args.title_threshold)
+    missing = crawled_data.iloc[missing_idx].copy()
+    missing['match_reason'] = [reason for reason, _ in match_reasons(scores, 'crawled', missing_idx, args.doi_threshold, args.title_threshold)]
+    missing.to_csv(args.missing, index=False)
+    extra = local_data.iloc[extra_idx].copy()
+    extra['match_reason'] = [reason for reason, _ in match_reasons(scores, 'local', extra_idx, args.doi_threshold, args.title_threshold)]
+    extra.to_csv(args.extra, index=False)
+    print(f"{len(missing_idx)} missing publications written to {args.missing}")
+    print(f"{len(extra_idx)} extra publications written to {args.extra}")
+
+
+if __name__ == "__main__":
+    main()
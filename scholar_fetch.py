@@ -0,0 +1,129 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from scholarly._navigator import Navigator
+from scholarly.data_types import PublicationSource
+from scholarly.publication_parser import PublicationParser
+
+from atomic_file import atomic_writer
+from jobs import check_cancelled
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SCHOLAR_CACHE_FILE = os.environ.get('PUB_APP_SCHOLAR_CACHE', 'scholar_cache.json')
+# Limits for one Google Scholar fetch; the rest is picked up by the next run
+SCHOLAR_TIME_BUDGET = float(os.environ.get('PUB_APP_SCHOLAR_TIME_BUDGET', 120))
+SCHOLAR_MAX_PAGES = int(os.environ.get('PUB_APP_SCHOLAR_MAX_PAGES', 10))
+# Cached profiles younger than this are used without any request
+SCHOLAR_CACHE_MAX_AGE = float(os.environ.get('PUB_APP_SCHOLAR_CACHE_MAX_AGE_DAYS', 7)) * 86400
+
+_PAGESIZE = 100
+_LIST_WORKS = '/citations?hl=en&user={0}&view_op=list_works&sortby=pubdate&cstart={1}&pagesize={2}'
+
+
+class ScholarProfileFetcher:
+    """
+    Bounded, resumable reader of a Google Scholar profile's publication list.
+
+    Instead of `scholarly.fill`, which scrapes every page of the profile, the
+    list is read newest first, one page at a time, and reading stops as soon
+    as the requested years are covered or the time or page budget is used
+    up. The state after every page is persisted in scholar_cache.json, so an
+    interrupted or budget-limited fetch continues where it stopped.
+
+    The pages are requested through scholarly's shared Navigator (a
+    singleton), so proxy and retry settings made via `scholarly` still apply.
+    """
+
+    def __init__(self, cache_file=SCHOLAR_CACHE_FILE, time_budget=SCHOLAR_TIME_BUDGET, max_pages=SCHOLAR_MAX_PAGES):
+        self.cache_file = cache_file
+        self.time_budget = time_budget
+        self.max_pages = max_pages
+        self._lock = threading.Lock()
+        self.profiles = {}
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as file:
+                    self.profiles = json.load(file)
+            except (OSError, ValueError):
+                logger.exception(f"Could not read Google Scholar cache {cache_file}")
+
+    def _save(self):
+        with self._lock:
+            with atomic_writer(self.cache_file) as file:
+                json.dump(self.profiles, file, ensure_ascii=False)
+
+    @staticmethod
+    def _covers(state, min_year):
+        if state['complete']:
+            return True
+        return min_year is not None and state['oldest_year'] is not None and state['oldest_year'] < min_year
+
+    def _read_page(self, scholar_id, start):
+        """Returns the publication bibs of one list page and whether more pages follow."""
+        nav = Navigator()
+        soup = nav._get_soup(_LIST_WORKS.format(scholar_id, start, _PAGESIZE))
+        metrics.count('requests.google_scholar')
+        parser = PublicationParser(nav)
+        rows = soup.find_all('tr', class_='gsc_a_tr')
+        bibs = [parser.get_publication(row, PublicationSource.AUTHOR_PUBLICATION_ENTRY).get('bib', {}) for row in rows]
+        more_button = soup.find('button', id='gsc_bpf_more')
+        has_more = bool(rows) and more_button is not None and 'disabled' not in more_button.attrs
+        return bibs, has_more
+
+    def _merge(self, state, bibs):
+        known = {pub['title'].lower() for pub in state['publications']}
+        for bib in bibs:
+            title = bib.get('title', '')
+            year = str(bib.get('pub_year', ''))
+            if year.isdigit():
+                state['oldest_year'] = min(int(year), state['oldest_year'] or int(year))
+            if title and title.lower() not in known:
+                known.add(title.lower())
+                state['publications'].append({'title': title, 'year': year if year.isdigit() else ''})
+
+    def fetch(self, scholar_id, min_year=None, progress=None, cancel_token=None):
+        """
+        Returns the cached and newly read publications ({'title', 'year'}) of
+        a profile, reading at most until `min_year` is covered. Cancelling
+        keeps everything read so far for the next run.
+        """
+        progress = progress or (lambda message: None)
+        state = self.profiles.setdefault(scholar_id, {
+            'publications': [], 'next_start': 0, 'oldest_year': None, 'complete': False, 'fetched': 0,
+        })
+        fresh = time.time() - state['fetched'] < SCHOLAR_CACHE_MAX_AGE
+        metrics.cache_lookup('google_scholar', fresh and self._covers(state, min_year))
+        if fresh and self._covers(state, min_year):
+            progress(f"Using cached Google Scholar publications ({len(state['publications'])} entries).")
+            return list(state['publications'])
+
+        # A stale profile is re-read from the top first to pick up new publications
+        starts = []
+        if not fresh and state['next_start']:
+            starts.append(0)
+        deadline = time.monotonic() + self.time_budget
+        pages = 0
+        while pages < self.max_pages and time.monotonic() < deadline:
+            check_cancelled(cancel_token)
+            start = starts.pop(0) if starts else state['next_start']
+            bibs, has_more = self._read_page(scholar_id, start)
+            pages += 1
+            self._merge(state, bibs)
+            if start == state['next_start']:
+                state['next_start'] = start + len(bibs)
+                state['complete'] = not has_more
+            state['fetched'] = time.time()
+            self._save()
+            progress(f"Google Scholar page {pages}: {len(state['publications'])} publications, oldest year {state['oldest_year']}.")
+            if not starts and self._covers(state, min_year):
+                break
+        else:
+            progress("Google Scholar budget exhausted; the next run resumes from here.")
+            logger.info(f"Google Scholar fetch for {scholar_id} stopped after {pages} pages at offset {state['next_start']}")
+
+        return list(state['publications'])
@@ -1,4 +1,6 @@
+import atexit
 import os
+import queue
 import re
 import subprocess
 import threading
@@ -7,8 +9,9 @@ import tkinter as tk
 import traceback
 import unicodedata
 from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
 from tkinter import filedialog, messagebox, scrolledtext, simpledialog, ttk
+from xml.etree import ElementTree
 
 import certifi
 import pandas as pd
@@ -17,29 +20,98 @@ from bibtexparser.bibdatabase import BibDatabase
 from bibtexparser.bparser import BibTexParser
 from bibtexparser.bwriter import BibTexWriter
 from bs4 import BeautifulSoup
-from crossref_commons.iteration import iterate_publications_as_json
-from rapidfuzz import fuzz
 from requests.adapters import HTTPAdapter
 from scholarly import scholarly
 from urllib3.util import Retry
 
+import bib_index
+import exporter
+import pub_compare
+from author_registry import AuthorRegistry
+from jobs import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, JobScheduler, check_cancelled, wait_for
+from metrics import metrics
+from profiling import PROFILE_ENABLED, profile_run
+from progress import JsonLinesSubscriber, ProgressBus
+from scholar_fetch import ScholarProfileFetcher
+
 # Ensure the script uses certifi's CA bundle
 os.environ['SSL_CERT_FILE'] = certifi.where()
 
-# Initialize a thread pool for background tasks
-executor = ThreadPoolExecutor(max_workers=5)
+# API endpoints; overridable so benchmarks can replay recorded responses from a local stub server
+CROSSREF_API = os.environ.get('CROSSREF_API', 'https://api.crossref.org')
+SEMANTIC_SCHOLAR_API = os.environ.get('SEMANTIC_SCHOLAR_API', 'https://api.semanticscholar.org/graph/v1')
+DBLP_API = os.environ.get('DBLP_API', 'https://dblp.org')
+
+# Contact address for Crossref's polite pool (faster, more reliable service)
+CROSSREF_MAILTO = os.environ.get('CROSSREF_MAILTO', '')
+# Works per page; deep paging with the cursor continues until CROSSREF_MAX_RESULTS works were read
+CROSSREF_ROWS = 200
+CROSSREF_MAX_RESULTS = int(os.environ.get('CROSSREF_MAX_RESULTS', 5000))
+# Only the work fields parse_crossref_item uses; reference lists are not transferred
+CROSSREF_SELECT = ','.join([
+    'DOI', 'title', 'author', 'published-print', 'published-online', 'container-title', 'publisher', 'abstract',
+    'ISSN', 'ISBN', 'URL', 'type', 'language', 'page', 'volume', 'issue', 'references-count', 'subject',
+])
+
+# Progress display is refreshed at this interval; messages in between are coalesced
+PROGRESS_TICK_MS = 100
+# Optional JSON Lines log of all progress events
+PROGRESS_LOG = os.environ.get('PUB_APP_PROGRESS_LOG', '')
+
+# Missing publications are exported to <EXPORT_BASENAME>.bib/.csv/.jsonl; the UI shows the first PREVIEW_ENTRIES
+EXPORT_BASENAME = os.environ.get('PUB_APP_EXPORT', 'missing_publications')
+PREVIEW_ENTRIES = int(os.environ.get('PUB_APP_PREVIEW_ENTRIES', 200))
+# Result column explaining why a record did not match
+REASON_COLUMN = 'match_reason'
 
 import logging
 
-# Configure logging to file
-logging.basicConfig(
-    filename='publication_app.log',
-    filemode='a',
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
 logger = logging.getLogger(__name__)
 
+
+def setup_logging():
+    """
+    Configures logging to file; records are handed to a listener thread so
+    callers never wait on disk I/O. Called from `main` only, so importing
+    this module (e.g. in a comparison worker process) starts no threads.
+    """
+    log_queue = queue.SimpleQueue()
+    log_file_handler = logging.FileHandler('publication_app.log', mode='a', encoding='utf-8')
+    log_file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    log_listener = QueueListener(log_queue, log_file_handler)
+    logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(log_queue)])
+    log_listener.start()
+    atexit.register(log_listener.stop)
+
+
+def parse_years(text):
+    """Parses the year field, e.g. "2019-2021, 2023" -> ['2019', '2020', '2021', '2023']."""
+    years = []
+    for part in (text or '').split(','):
+        part = part.strip()
+        first, _, last = part.partition('-')
+        if last and first.strip().isdigit() and last.strip().isdigit():
+            years.extend(str(year) for year in range(int(first), int(last) + 1))
+        elif part:
+            years.append(part)
+    return list(dict.fromkeys(years))
+
+
+def year_spans(years):
+    """
+    Collapses the requested years into contiguous (first, last) ranges, e.g.
+    ['2019', '2020', '2023'] -> [(2019, 2020), (2023, 2023)], so every source
+    is asked only for those years. Returns [] when no year is given.
+    """
+    spans = []
+    for year in sorted({int(year) for year in years or [] if str(year).strip().isdigit()}):
+        if spans and year == spans[-1][1] + 1:
+            spans[-1] = (spans[-1][0], year)
+        else:
+            spans.append((year, year))
+    return spans
+
+
 class PublicationApp:
     def __init__(self, master):
         self.master = master
@@ -99,6 +171,39 @@ class PublicationApp:
             cb = ttk.Checkbutton(self.frame_sources, text=source, variable=var)
             cb.pack(side=tk.LEFT, padx=(5, 5))
 
+        # Opt-in profiling of loads and comparisons (artifacts go to ./profiles)
+        self.profile_var = tk.BooleanVar(value=PROFILE_ENABLED)
+        self.profile_check = ttk.Checkbutton(self.frame_sources, text="Profile runs", variable=self.profile_var)
+        self.profile_check.pack(side=tk.RIGHT, padx=(5, 5))
+
+        # Match thresholds; changing them re-classifies the last comparison from its cached scores
+        self.doi_threshold = pub_compare.DOI_THRESHOLD
+        self.title_threshold = pub_compare.TITLE_THRESHOLD
+        self.doi_threshold_var = tk.IntVar(value=self.doi_threshold)
+        self.title_threshold_var = tk.IntVar(value=self.title_threshold)
+        ttk.Label(self.frame_sources, text="DOI threshold:").pack(side=tk.LEFT, padx=(20, 5))
+        ttk.Spinbox(self.frame_sources, from_=0, to=100, increment=5, width=5, textvariable=self.doi_threshold_var).pack(side=tk.LEFT)
+        ttk.Label(self.frame_sources, text="Title threshold:").pack(side=tk.LEFT, padx=(10, 5))
+        ttk.Spinbox(self.frame_sources, from_=0, to=100, increment=5, width=5, textvariable=self.title_threshold_var).pack(side=tk.LEFT)
+        self.doi_threshold_var.trace_add('write', self.on_threshold_changed)
+        self.title_threshold_var.trace_add('write', self.on_threshold_changed)
+
+        # Background jobs with their status and a cancel button
+        self.jobs_frame = ttk.Frame(master)
+        self.jobs_frame.pack(padx=10, pady=5, fill='x')
+
+        job_columns = ("Job", "Status", "Time")
+        self.jobs_tree = ttk.Treeview(self.jobs_frame, columns=job_columns, show='headings', height=3)
+        for col in job_columns:
+            self.jobs_tree.heading(col, text=col)
+        self.jobs_tree.column("Job", width=600, anchor=tk.W)
+        self.jobs_tree.column("Status", width=100, anchor=tk.W)
+        self.jobs_tree.column("Time", width=80, anchor=tk.E)
+        self.jobs_tree.pack(side=tk.LEFT, fill='x', expand=True)
+
+        self.cancel_button = ttk.Button(self.jobs_frame, text="Cancel Job", command=self.cancel_selected_job)
+        self.cancel_button.pack(side=tk.LEFT, padx=(10, 0))
+
         # Publications display area using Treeview
         self.tree_frame = ttk.Frame(master)
         self.tree_frame.pack(pady=10, padx=10, fill=tk.BOTH, expand=True)
@@ -123,6 +228,10 @@ class PublicationApp:
         self.status_bar = ttk.Label(master, text="Ready", relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
 
+        # Per-source counters and ETA of the running fetch
+        self.progress_counters = ttk.Label(master, text="", anchor=tk.W)
+        self.progress_counters.pack(side=tk.BOTTOM, fill=tk.X)
+
         # Missing publications area
         self.missing_frame = ttk.Frame(master)
         self.missing_frame.pack(pady=10, padx=10, fill=tk.BOTH, expand=True)
@@ -130,8 +239,9 @@ class PublicationApp:
         self.missing_label = ttk.Label(self.missing_frame, text="Missing Publications:")
         self.missing_label.pack()
 
-        self.missing_tree = ttk.Treeview(self.missing_frame, columns=columns, show='headings', height=10)
-        for col in columns:
+        result_columns = columns + ("Reason",)
+        self.missing_tree = ttk.Treeview(self.missing_frame, columns=result_columns, show='headings', height=10)
+        for col in result_columns:
             self.missing_tree.heading(col, text=col)
             self.missing_tree.column(col, width=200, anchor=tk.W)
         self.missing_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -148,8 +258,8 @@ class PublicationApp:
         self.extra_label = ttk.Label(self.extra_frame, text="Extra Publications (Only in Local BibTeX):")
         self.extra_label.pack()
 
-        self.extra_tree = ttk.Treeview(self.extra_frame, columns=columns, show='headings', height=10)
-        for col in columns:
+        self.extra_tree = ttk.Treeview(self.extra_frame, columns=result_columns, show='headings', height=10)
+        for col in result_columns:
             self.extra_tree.heading(col, text=col)
             self.extra_tree.column(col, width=200, anchor=tk.W)
         self.extra_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -171,29 +281,93 @@ class PublicationApp:
         self.statistics_text = scrolledtext.ScrolledText(master, wrap=tk.WORD, width=100, height=5)
         self.statistics_text.pack(pady=10)
 
+        # Shared HTTP session with connection reuse and retries on transient errors
+        self.http = requests.Session()
+        retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+        self.http.mount('https://', HTTPAdapter(max_retries=retries))
+        self.http.mount('http://', HTTPAdapter(max_retries=retries))
+
+        # Persistent mapping of authors to their IDs on each source
+        self.author_registry = AuthorRegistry()
+        # Budgeted, resumable Google Scholar profile reader
+        self.scholar_fetcher = ScholarProfileFetcher()
+        # Similarity scores of recent comparisons and the last compared data
+        self.score_cache = pub_compare.ScoreCache()
+        self.comparison = None
+        self._export_job = None
+
+        # Progress events from worker threads, drained on the Tk main thread every tick
+        self.progress = ProgressBus()
+        self.progress.subscribe(self.on_progress_events)
+        if PROGRESS_LOG:
+            self.progress.subscribe(JsonLinesSubscriber(PROGRESS_LOG))
+        self.master.after(PROGRESS_TICK_MS, self._progress_tick)
+
+        # Scheduler for background tasks (loading, filtering, crawling, exporting). Job status
+        # changes arrive on worker threads; the jobs view is refreshed on the next tick
+        self.scheduler = JobScheduler(max_workers=5)
+        self._jobs_dirty = True
+        self.scheduler.subscribe(self.on_job_changed)
+
         # Initialize publications
         self.publications = {}
         self.bibtex_file = None
+        self.bib_index = None
 
     def load_publications(self):
-        try:
-            self.bibtex_file = filedialog.askopenfilename(
-                title="Select BibTeX File",
-                filetypes=[("BibTeX files", "*.bib"), ("All files", "*.*")]
+        bibtex_file = filedialog.askopenfilename(
+            title="Select BibTeX File",
+            filetypes=[("BibTeX files", "*.bib"), ("All files", "*.*")]
+        )
+        if bibtex_file:
+            # Loads share the 'library' group with the crawls, so the index is never replaced while a crawl reads it
+            self.scheduler.submit(
+                f"Load {os.path.basename(bibtex_file)}", self.perform_load, bibtex_file, self.profile_var.get(),
+                key=('load', bibtex_file), priority=PRIORITY_INTERACTIVE, group='library',
             )
-            if self.bibtex_file:
-                with open(self.bibtex_file, 'r', encoding='utf-8') as file:
-                    bibtex_str = file.read()
-                bib_database = BibTexParser(common_strings=True).parse(bibtex_str)
-                self.publications = self.organize_by_year(bib_database.entries)
-                self.display_publications()  # Display all publications initially
-                self.update_progress(f"Loaded publications from {self.bibtex_file}")
+
+    def perform_load(self, bibtex_file, profile=False, cancel_token=None):
+        try:
+            load_params = {'file': bibtex_file}
+            with profile_run('load', load_params, enabled=profile), metrics.span('load'):
+                self.load_library(bibtex_file)
+                load_params['entries'] = len(self.bib_index) if self.bib_index else None
+            self.bibtex_file = bibtex_file
+            rows = self.filter_rows()  # Display all publications initially
+            self.master.after(0, lambda: self.render_publications(rows))
+            self.update_progress(f"Loaded publications from {bibtex_file}")
+            self.master.after(0, lambda: self.report_metrics({'action': 'load', 'file': bibtex_file}))
         except FileNotFoundError:
-            messagebox.showerror("Error", "BibTeX file not found. Please check the file path.")
+            self.master.after(0, lambda: messagebox.showerror("Error", "BibTeX file not found. Please check the file path."))
         except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+            msg = str(e)
+            self.master.after(0, lambda msg=msg: messagebox.showerror("Error", f"An error occurred: {msg}"))
             logger.exception("Error in load_publications")
 
+    def load_library(self, bibtex_file):
+        # Use the compiled index if it is up to date, otherwise parse the file and (re)build the index
+        if self.bib_index is not None:
+            self.bib_index.close()
+            self.bib_index = None
+        self.bib_index = bib_index.open_index_for(bibtex_file)
+        metrics.cache_lookup('bib_index', self.bib_index is not None)
+        if self.bib_index is not None:
+            with metrics.span('load.index'):
+                self.publications = self.bib_index.publications_by_year()
+            return
+
+        with metrics.span('load.parse'):
+            with open(bibtex_file, 'r', encoding='utf-8') as file:
+                bibtex_str = file.read()
+            bib_database = BibTexParser(common_strings=True).parse(bibtex_str)
+            self.publications = self.organize_by_year(bib_database.entries)
+        try:
+            with metrics.span('load.build_index'):
+                path = bib_index.build_index(bib_database.entries, bib_index.index_path_for(bibtex_file), source=bibtex_file)
+            self.bib_index = bib_index.BibIndex(path)
+        except Exception:
+            logger.exception("Could not build the library index")
+
     def organize_by_year(self, entries):
         publications_by_year = defaultdict(list)
         for entry in entries:
@@ -202,31 +376,51 @@ class PublicationApp:
         return publications_by_year
 
     def display_publications(self, years=None, first_name=None, last_name=None):
-        # Clear the Treeview
-        for item in self.publication_tree.get_children():
-            self.publication_tree.delete(item)
-
-        filtered_years = {year.strip() for year in (years or '').split(',')} if years else set()
-        for pub_year, publications in sorted(self.publications.items()):
-            if not years or pub_year in filtered_years:
-                for publication in publications:
-                    authors = publication.get('author', 'Unknown author')
-                    if (not first_name or first_name.lower() in authors.lower()) and (not last_name or last_name.lower() in authors.lower()):
-                        title = publication.get('title', 'No title available')
-                        doi = publication.get('doi', '')
-                        self.publication_tree.insert('', tk.END, values=(title, authors, pub_year, doi))
+        self.render_publications(self.filter_rows(years, first_name, last_name))
+
+    def filter_rows(self, years=None, first_name=None, last_name=None, cancel_token=None):
+        # Selects the rows to show; safe to run off the Tk main thread
+        rows = []
+        if years:
+            # Only the requested years are visited instead of the whole library
+            selected = [(year, self.publications.get(year, [])) for year in sorted(parse_years(years))]
+        else:
+            selected = sorted(self.publications.items())
+        for pub_year, publications in selected:
+            check_cancelled(cancel_token)
+            for publication in publications:
+                authors = publication.get('author', 'Unknown author')
+                if (not first_name or first_name.lower() in authors.lower()) and (not last_name or last_name.lower() in authors.lower()):
+                    title = publication.get('title', 'No title available')
+                    doi = publication.get('doi', '')
+                    rows.append((title, authors, pub_year, doi))
+        return rows
+
+    def render_publications(self, rows):
+        with metrics.span('render.publications'):
+            # Clear the Treeview
+            self.publication_tree.delete(*self.publication_tree.get_children())
+            for values in rows:
+                self.publication_tree.insert('', tk.END, values=values)
 
     def filter_by_criteria(self):
         years = self.entry_year.get()
         first_name = self.entry_author_first.get()
         last_name = self.entry_author_last.get()
-        self.display_publications(years, first_name, last_name)
+        self.scheduler.submit(
+            "Filter publications", self.perform_filter, years, first_name, last_name,
+            key=('filter', years, first_name, last_name), priority=PRIORITY_INTERACTIVE,
+        )
+
+    def perform_filter(self, years, first_name, last_name, cancel_token=None):
+        rows = self.filter_rows(years, first_name, last_name, cancel_token)
+        self.master.after(0, lambda: self.render_publications(rows))
 
     def fetch_and_compare(self):
         # Get input for comparison
         first_name = self.entry_author_first.get()
         last_name = self.entry_author_last.get()
-        years = [year.strip() for year in self.entry_year.get().split(',') if year.strip()]
+        years = parse_years(self.entry_year.get())
 
         if not last_name or not years:
             messagebox.showerror("Error", "Please specify at least the last name and year(s).")
@@ -236,33 +430,96 @@ class PublicationApp:
             messagebox.showerror("Error", "Please load a BibTeX file first.")
             return
 
-        # Execute the crawling and comparison in a separate thread
-        executor.submit(self.perform_crawl_and_compare, first_name, last_name, years)
+        selected_sources = [source for source, var in self.source_vars.items() if var.get()]
+        if not selected_sources:
+            messagebox.showerror("Error", "Please select at least one source to fetch publications.")
+            return
 
-    def update_progress(self, message):
-        # Ensure thread-safe update for GUI components
-        self.master.after(0, lambda: self.progress_text.insert(tk.END, message + "\n"))
-        self.master.after(0, lambda: self.progress_text.see(tk.END))
-        self.master.after(0, lambda: self.status_bar.config(text=message))
+        # Crawls run one at a time in the background, never alongside a load; an identical pending or running crawl is reused
+        key = ('crawl', first_name, last_name, tuple(years), tuple(selected_sources))
+        job = self.scheduler.submit(
+            f"Fetch & compare {first_name} {last_name} ({', '.join(years)})".replace('  ', ' '),
+            self.perform_crawl_and_compare, first_name, last_name, years, selected_sources, self.profile_var.get(),
+            key=key, priority=PRIORITY_BACKGROUND, group='library',
+        )
+        if job.status == 'running':
+            self.update_progress("The same comparison is already running.")
+        elif any(other.active and other.group == 'library' and other is not job for other in self.scheduler.jobs()):
+            self.update_progress("Comparison queued behind the running job.")
+
+    def cancel_selected_job(self):
+        # Only explicitly selected jobs are cancelled; a blanket cancel could cut off a running export
+        selection = self.jobs_tree.selection()
+        if not selection:
+            self.update_progress("Select the job to cancel in the job list.")
+            return
+        for item in selection:
+            self.scheduler.cancel(int(item))
+
+    def on_job_changed(self, job):
+        self._jobs_dirty = True
+        if job.status == 'cancelled':
+            self.update_progress(f"Job '{job.name}' cancelled.")
+        elif job.status == 'failed':
+            self.update_progress(f"Job '{job.name}' failed: {job.error}")
+
+    def refresh_jobs(self):
+        self._jobs_dirty = False
+        self.scheduler.forget_finished()
+        selection = set(self.jobs_tree.selection())
+        self.jobs_tree.delete(*self.jobs_tree.get_children())
+        for job in sorted(self.scheduler.jobs(), key=lambda job: job.id, reverse=True):
+            self.jobs_tree.insert('', tk.END, iid=str(job.id), values=(job.name, job.status, f"{job.elapsed():.1f}s"))
+        self.jobs_tree.selection_set([item for item in selection if self.jobs_tree.exists(item)])
+
+    def update_progress(self, message, source=None, done=None, total=None, finished=False):
+        # Safe from any thread: the event is queued and shown on the next UI tick
+        self.progress.publish(message, source, done, total, finished)
         logger.info(message)
 
-    def perform_crawl_and_compare(self, first_name, last_name, years):
+    def _progress_tick(self):
+        try:
+            self.progress.drain()
+            if self._jobs_dirty or any(job.status == 'running' for job in self.scheduler.jobs()):
+                self.refresh_jobs()
+        finally:
+            self.master.after(PROGRESS_TICK_MS, self._progress_tick)
+
+    def on_progress_events(self, events, tracker):
+        # One widget update per tick, however many messages arrived
+        self.progress_text.insert(tk.END, ''.join(event.message + "\n" for event in events))
+        self.progress_text.see(tk.END)
+        self.status_bar.config(text=events[-1].message)
+        self.progress_counters.config(text=tracker.summary())
+
+    def report_metrics(self, params):
+        # Runs on the Tk main thread after the queued render callbacks
+        table = metrics.report(params)
+        if table:
+            self.progress_text.insert(tk.END, "Run metrics:\n" + table + "\n")
+            self.progress_text.see(tk.END)
+
+    def perform_crawl_and_compare(self, first_name, last_name, years, selected_sources, profile=False, cancel_token=None):
+        run_params = {'action': 'crawl_and_compare', 'first_name': first_name, 'last_name': last_name, 'years': years, 'sources': selected_sources}
+        with profile_run('crawl_and_compare', run_params, enabled=profile):
+            self._crawl_and_compare(first_name, last_name, years, selected_sources, run_params, cancel_token)
+
+    def _crawl_and_compare(self, first_name, last_name, years, selected_sources, run_params, cancel_token=None):
+        # Save and export jobs started by this run; their write spans belong to this run's metrics
+        spawned = []
         try:
             self.update_progress("Fetching publications from the internet...")
 
             # Fetch publications from the internet for comparison
-            selected_sources = [source for source, var in self.source_vars.items() if var.get()]
-            if not selected_sources:
-                self.update_progress("No sources selected. Please select at least one source.")
-                self.master.after(0, lambda: messagebox.showerror("Error", "Please select at least one source to fetch publications."))
-                return
-
-            crawled_data = self.fetch_entries_by_author(first_name, last_name, selected_sources)
+            with metrics.span('fetch'):
+                crawled_data = self.fetch_entries_by_author(first_name, last_name, selected_sources, years, cancel_token)
+            check_cancelled(cancel_token)
+            run_params['crawled'] = len(crawled_data)
             if not crawled_data.empty:
                 self.update_progress("Fetching complete. Now filtering by year...")
 
                 # Save crawled publications to a CSV file
-                self.save_crawled_publications_to_file(crawled_data)
+                spawned.append(self.save_crawled_publications_to_file(crawled_data))
 
                 # Filter the crawled data by the specified years
                 crawled_data['year'] = crawled_data['year'].astype(str)  # Ensure year is a string for comparison
@@ -276,9 +533,11 @@ class PublicationApp:
 
                     # Compare completed crawled data with local data
                     self.update_progress("Comparing local and crawled publications...")
-                    local_bibtex_data = self.convert_to_dataframe(self.publications, years, first_name, last_name)
+                    with metrics.span('filter.local'):
+                        local_bibtex_data = self.convert_to_dataframe(self.publications, years, first_name, last_name)
+                    run_params['local'] = len(local_bibtex_data)
 
-                    missing_pubs, extra_pubs = self.compare_publications(local_bibtex_data, completed_crawled_data)
+                    missing_pubs, extra_pubs = self.compare_publications(local_bibtex_data, completed_crawled_data, cancel_token)
 
                     self.update_progress("Displaying missing publications...")
                     self.display_missing_publications(missing_pubs)
@@ -286,6 +545,7 @@ class PublicationApp:
                     self.display_extra_publications(extra_pubs)
                     self.update_progress("Generating BibTeX for missing publications...")
                     self.display_missing_bibtex(missing_pubs)
+                    spawned.append(self.export_missing_publications(missing_pubs))
 
                     # Update statistics
                     self.update_progress("Updating statistics...")
@@ -306,52 +566,70 @@ class PublicationApp:
         except Exception as e:
             self.update_progress(f"An unexpected error occurred: {str(e)}")
             logger.exception("Unexpected error in perform_crawl_and_compare")
+        finally:
+            # The crawl stays running (and the next one queued) until its exports are written, so the
+            # report, which also resets the metrics, covers the write stage of this run and no other
+            wait_for(spawned, cancel_token)
+            self.master.after(0, lambda: self.report_metrics(run_params))
 
-    def fetch_entries_by_author(self, first_name, last_name, selected_sources):
+    def fetch_entries_by_author(self, first_name, last_name, selected_sources, years=None, cancel_token=None):
         author = f"{first_name} {last_name}".strip()
         publications = []
 
         try:
+            self.progress.reset_counters()
             self.update_progress(f"Fetching entries for author: {author}")
 
             if 'Crossref' in selected_sources:
+                check_cancelled(cancel_token)
                 try:
-                    self.update_progress("Fetching from Crossref...")
-                    crossref_pubs = self.fetch_from_crossref(first_name, last_name)
+                    self.update_progress("Fetching from Crossref...", source='Crossref', done=0)
+                    with metrics.span('fetch.crossref'):
+                        crossref_pubs = self.fetch_from_crossref(first_name, last_name, years, cancel_token=cancel_token)
+                    metrics.count('records.crossref', len(crossref_pubs))
                     publications.extend(crossref_pubs)
-                    self.update_progress(f"Crossref fetch complete. Found {len(crossref_pubs)} publications.")
+                    self.update_progress(f"Crossref fetch complete. Found {len(crossref_pubs)} publications.", source='Crossref', finished=True)
                 except Exception as e:
-                    self.update_progress(f"Error fetching from Crossref: {str(e)}")
+                    self.update_progress(f"Error fetching from Crossref: {str(e)}", source='Crossref', finished=True)
                     logger.exception("Exception in fetch_from_crossref")
 
             if 'Semantic Scholar' in selected_sources:
+                check_cancelled(cancel_token)
                 try:
-                    self.update_progress("Fetching from Semantic Scholar...")
-                    semantic_scholar_pubs = self.fetch_from_semantic_scholar(first_name, last_name)
+                    self.update_progress("Fetching from Semantic Scholar...", source='Semantic Scholar', done=0)
+                    with metrics.span('fetch.semantic_scholar'):
+                        semantic_scholar_pubs = self.fetch_from_semantic_scholar(first_name, last_name, years, cancel_token)
+                    metrics.count('records.semantic_scholar', len(semantic_scholar_pubs))
                     publications.extend(semantic_scholar_pubs)
-                    self.update_progress(f"Semantic Scholar fetch complete. Found {len(semantic_scholar_pubs)} publications.")
+                    self.update_progress(f"Semantic Scholar fetch complete. Found {len(semantic_scholar_pubs)} publications.", source='Semantic Scholar', done=len(semantic_scholar_pubs), finished=True)
                 except Exception as e:
-                    self.update_progress(f"Error fetching from Semantic Scholar: {str(e)}")
+                    self.update_progress(f"Error fetching from Semantic Scholar: {str(e)}", source='Semantic Scholar', finished=True)
                     logger.exception("Exception in fetch_from_semantic_scholar")
 
             if 'Google Scholar' in selected_sources:
+                check_cancelled(cancel_token)
                 try:
-                    self.update_progress("Fetching from Google Scholar...")
-                    google_scholar_pubs = self.fetch_from_google_scholar(first_name, last_name)
+                    self.update_progress("Fetching from Google Scholar...", source='Google Scholar', done=0)
+                    with metrics.span('fetch.google_scholar'):
+                        google_scholar_pubs = self.fetch_from_google_scholar(first_name, last_name, years, cancel_token)
+                    metrics.count('records.google_scholar', len(google_scholar_pubs))
                     publications.extend(google_scholar_pubs)
-                    self.update_progress(f"Google Scholar fetch complete. Found {len(google_scholar_pubs)} publications.")
+                    self.update_progress(f"Google Scholar fetch complete. Found {len(google_scholar_pubs)} publications.", source='Google Scholar', done=len(google_scholar_pubs), finished=True)
                 except Exception as e:
-                    self.update_progress(f"Error fetching from Google Scholar: {str(e)}")
+                    self.update_progress(f"Error fetching from Google Scholar: {str(e)}", source='Google Scholar', finished=True)
                     logger.exception("Exception in fetch_from_google_scholar")
 
             if 'DBLP' in selected_sources:
+                check_cancelled(cancel_token)
                 try:
-                    self.update_progress("Fetching from DBLP...")
-                    dblp_pubs = self.fetch_from_dblp(first_name, last_name)
+                    self.update_progress("Fetching from DBLP...", source='DBLP', done=0)
+                    with metrics.span('fetch.dblp'):
+                        dblp_pubs = self.fetch_from_dblp(first_name, last_name, years, cancel_token)
+                    metrics.count('records.dblp', len(dblp_pubs))
                     publications.extend(dblp_pubs)
-                    self.update_progress(f"DBLP fetch complete. Found {len(dblp_pubs)} publications.")
+                    self.update_progress(f"DBLP fetch complete. Found {len(dblp_pubs)} publications.", source='DBLP', done=len(dblp_pubs), finished=True)
                 except Exception as e:
-                    self.update_progress(f"Error fetching from DBLP: {str(e)}")
+                    self.update_progress(f"Error fetching from DBLP: {str(e)}", source='DBLP', finished=True)
                     logger.exception("Exception in fetch_from_dblp")
 
             time.sleep(2)  # Optional: wait to ensure all processes are complete
@@ -359,119 +637,294 @@ class PublicationApp:
             self.update_progress(f"Error fetching entries for {first_name} {last_name}: {str(e)}")
             logger.exception("Error in fetch_entries_by_author")
 
-        unique_publications = self.remove_duplicates(publications)
+        with metrics.span('dedup'):
+            unique_publications = self.remove_duplicates(publications)
 
         self.update_progress(f"Finished fetching entries. Total unique publications found: {len(unique_publications)}")
 
         if not unique_publications:
             self.update_progress("No publications found. Check if the APIs are accessible and the author name is correct.")
-        else:
-            self.save_crawled_publications_to_file(pd.DataFrame(unique_publications))
 
         return pd.DataFrame(unique_publications)
 
-    def fetch_from_crossref(self, first_name, last_name, max_results=1000):
+    def fetch_from_crossref(self, first_name, last_name, years=None, max_results=CROSSREF_MAX_RESULTS, cancel_token=None):
         publications = []
         query = f"{first_name} {last_name}"
 
-        filter = {
-            'from-pub-date': '2000-01-01',
-        }
-        queries = {'query.author': query}
+        # Restrict the publication dates to the requested years, one query per contiguous range. Crossref
+        # filters on the earliest date, the year is taken from the print date, which can be a year later
+        # (online 2022, print 2023); the lower bound is widened by a year and the year filter trims the rest.
+        filters = [f"from-pub-date:{first - 1}-01-01,until-pub-date:{last}-12-31" for first, last in year_spans(years)]
+        if not filters:
+            filters = ['from-pub-date:2000-01-01']
+
+        # With a registered ORCID only the works linked to it are requested; otherwise query.author is a
+        # ranked free-text match, which is read page by page until a page contains none of the author's works
+        orcid = self.author_registry.get(first_name, last_name, 'orcid')
 
         try:
-            for item in iterate_publications_as_json(max_results=max_results, filter=filter, queries=queries):
-                if self.author_match(f"{first_name} {last_name}", item.get('author', [])):
-                    pub = self.parse_crossref_item(item)
-                    publications.append(pub)
+            count = 0
+            for filter in filters:
+                if count >= max_results:
+                    break
+                params = {
+                    'filter': f"orcid:{orcid},{filter}" if orcid else filter,
+                    'select': CROSSREF_SELECT,
+                }
+                if not orcid:
+                    params['query.author'] = query
+                for items in self.iterate_crossref_pages(params, max_results - count, count, bool(orcid), cancel_token):
+                    count += len(items)
+                    metrics.count('items.crossref', len(items))
+                    hits = 0
+                    for item in items:
+                        authors = item.get('author', [])
+                        if self.author_match(query, authors) or (orcid and any(a.get('ORCID', '').endswith(orcid) for a in authors)):
+                            publications.append(self.parse_crossref_item(item))
+                            hits += 1
+                    if not hits and not orcid:
+                        break
         except Exception as e:
             self.update_progress(f"Error fetching from Crossref: {str(e)}")
             logger.exception("Exception in fetch_from_crossref")
 
         return publications
 
-    def fetch_from_semantic_scholar(self, first_name, last_name):
+    def iterate_crossref_pages(self, params, limit, read_before=0, exact_total=False, cancel_token=None):
+        """
+        Yields pages (lists) of up to `limit` Crossref work items in total using
+        cursor-based deep paging; the next page is only requested when the
+        caller asks for it. Progress counts the works read, `read_before` of
+        them by earlier queries of the same fetch. Only with `exact_total`
+        (a filter instead of a ranked query) is total-results shown as total.
+        """
+        params = dict(params, rows=min(CROSSREF_ROWS, limit), cursor='*')
+        headers = {}
+        if CROSSREF_MAILTO:
+            params['mailto'] = CROSSREF_MAILTO
+            headers['User-Agent'] = f"tk_pub_app/2.6 (mailto:{CROSSREF_MAILTO})"
+
+        fetched = 0
+        while True:
+            check_cancelled(cancel_token)
+            response = self.http.get(f'{CROSSREF_API}/works', params=params, headers=headers, timeout=60)
+            metrics.record_request('crossref', response)
+            response.raise_for_status()
+            message = response.json().get('message', {})
+            items = message.get('items', [])[:limit - fetched]
+            fetched += len(items)
+            # A ranked query matches far more works than are read, so its total-results is meaningless here
+            total = read_before + min(message.get('total-results') or fetched, limit) if exact_total else None
+            self.update_progress(f"Crossref: {read_before + fetched} works read", source='Crossref',
+                                 done=read_before + fetched, total=total)
+            yield items
+            next_cursor = message.get('next-cursor')
+            if fetched >= limit or len(items) < params['rows'] or not next_cursor:
+                break
+            params['cursor'] = next_cursor
+
+    def fetch_from_semantic_scholar(self, first_name, last_name, years=None, cancel_token=None):
         publications = []
-        query = f"{first_name} {last_name}"
 
         try:
-            # Initialize the Semantic Scholar API client
-            api_url = 'https://api.semanticscholar.org/graph/v1/author/search'
-            params = {
-                'query': query,
-                'fields': 'papers.title,papers.year,papers.authors,papers.doi,papers.externalIds',
-                'limit': 1
-            }
-            response = requests.get(api_url, params=params)
-            data = response.json()
-
-            if 'data' in data and data['data']:
-                author_id = data['data'][0]['authorId']
-                self.update_progress(f"Found Semantic Scholar author ID: {author_id}")
-
-                # Fetch papers by author ID
-                papers_url = f'https://api.semanticscholar.org/graph/v1/author/{author_id}/papers'
-                papers_params = {
-                    'fields': 'title,year,authors,doi,externalIds',
-                    'limit': 1000
-                }
-                papers_response = requests.get(papers_url, params=papers_params)
-                papers_data = papers_response.json()
-
-                if 'data' in papers_data:
-                    for paper in papers_data['data']:
-                        # Check if the author matches
-                        if any(self.author_match(query, f"{a.get('name', '')}") for a in paper.get('authors', [])):
-                            pub = {
-                                'title': paper.get('title', ''),
-                                'year': str(paper.get('year', '')),
-                                'author': ', '.join([a.get('name', '') for a in paper.get('authors', [])]),
-                                'doi': paper.get('doi', ''),
-                                'ENTRYTYPE': 'article',
-                                'ID': paper.get('doi', f"SS_{paper.get('paperId', '')}")
-                            }
-                            publications.append(pub)
+            author_id = self.resolve_semantic_scholar_id(first_name, last_name)
+            if author_id:
+                self.update_progress(f"Using Semantic Scholar author ID: {author_id}")
+
+                # Fetch papers by author ID; all of them belong to the resolved author
+                papers_url = f'{SEMANTIC_SCHOLAR_API}/author/{author_id}/papers'
+                papers = []
+                for year_param in [f"{first}-{last}" for first, last in year_spans(years)] or [None]:
+                    check_cancelled(cancel_token)
+                    papers_params = {
+                        'fields': 'title,year,authors,doi,externalIds',
+                        'limit': 1000
+                    }
+                    if year_param:
+                        papers_params['year'] = year_param
+                    papers_response = self.http.get(papers_url, params=papers_params, timeout=60)
+                    metrics.record_request('semantic_scholar', papers_response)
+                    papers.extend(papers_response.json().get('data', []))
+
+                for paper in papers:
+                    pub = {
+                        'title': paper.get('title', ''),
+                        'year': str(paper.get('year', '')),
+                        'author': ', '.join([a.get('name', '') for a in paper.get('authors', [])]),
+                        'doi': paper.get('doi', ''),
+                        'ENTRYTYPE': 'article',
+                        'ID': paper.get('doi', f"SS_{paper.get('paperId', '')}")
+                    }
+                    publications.append(pub)
+            elif author_id == '':
+                self.update_progress(f"No Semantic Scholar profile registered for {first_name} {last_name}.")
         except Exception as e:
             self.update_progress(f"Error fetching from Semantic Scholar: {str(e)}")
             logger.exception("Exception in fetch_from_semantic_scholar")
 
         return publications
 
-    def fetch_from_google_scholar(self, first_name, last_name):
-        publications = []
+    def resolve_semantic_scholar_id(self, first_name, last_name):
+        """
+        Returns the Semantic Scholar author ID from the registry, or searches
+        once and registers the matching profile with the most papers.
+        """
+        author_id = self.author_registry.get(first_name, last_name, 'semantic_scholar')
+        metrics.cache_lookup('author_registry', author_id is not None)
+        if author_id is not None:
+            return author_id
+
         query = f"{first_name} {last_name}"
+        params = {'query': query, 'fields': 'name,paperCount', 'limit': 10}
+        response = self.http.get(f'{SEMANTIC_SCHOLAR_API}/author/search', params=params, timeout=30)
+        metrics.record_request('semantic_scholar', response)
+        response.raise_for_status()
+        candidates = [a for a in response.json().get('data', []) if self.author_match(query, a.get('name', ''))]
+        candidates.sort(key=lambda a: a.get('paperCount') or 0, reverse=True)
+        author_id = candidates[0]['authorId'] if candidates else ''
+        self.author_registry.set(first_name, last_name, 'semantic_scholar', author_id)
+        return author_id
+
+    def fetch_from_google_scholar(self, first_name, last_name, years=None, cancel_token=None):
+        publications = []
+        numeric_years = [int(year) for year in years or [] if str(year).isdigit()]
+        min_year = min(numeric_years) if numeric_years else None
 
         try:
-            search_query = scholarly.search_author(query)
-            author = next(search_query, None)
-            if author:
-                author = scholarly.fill(author)
-                for pub in author['publications']:
-                    if 'bib' in pub:
-                        bib = pub['bib']
-                        # Check if the author matches
-                        if self.author_match(query, bib.get('author', '')):
-                            pub_data = {
-                                'title': bib.get('title', ''),
-                                'year': str(bib.get('pub_year', '')),
-                                'author': bib.get('author', ''),
-                                'doi': bib.get('doi', ''),
-                                'ENTRYTYPE': bib.get('ENTRYTYPE', 'article'),
-                                'ID': bib.get('doi', f"GS_{bib.get('title', '')}")
-                            }
-                            publications.append(pub_data)
+            scholar_id = self.resolve_google_scholar_id(first_name, last_name)
+            if scholar_id:
+                self.update_progress(f"Using Google Scholar profile: {scholar_id}")
+                # Reads the profile newest first only until the requested years are covered
+                for pub in self.scholar_fetcher.fetch(scholar_id, min_year, self.update_progress, cancel_token):
+                    pub_data = {
+                        'title': pub['title'],
+                        'year': pub['year'],
+                        'author': f"{first_name} {last_name}",
+                        'doi': '',
+                        'ENTRYTYPE': 'article',
+                        'ID': f"GS_{pub['title']}"
+                    }
+                    publications.append(pub_data)
+            elif scholar_id == '':
+                self.update_progress(f"No Google Scholar profile registered for {first_name} {last_name}.")
         except Exception as e:
             self.update_progress(f"Error fetching from Google Scholar: {str(e)}")
             logger.exception("Exception in fetch_from_google_scholar")
 
         return publications
 
-    def fetch_from_dblp(self, first_name, last_name):
+    def resolve_google_scholar_id(self, first_name, last_name, max_candidates=5):
+        scholar_id = self.author_registry.get(first_name, last_name, 'google_scholar')
+        metrics.cache_lookup('author_registry', scholar_id is not None)
+        if scholar_id is not None:
+            return scholar_id
+
+        query = f"{first_name} {last_name}"
+        scholar_id = ''
+        for i, candidate in enumerate(scholarly.search_author(query)):
+            if self.author_match(query, candidate.get('name', '')):
+                scholar_id = candidate.get('scholar_id', '')
+                break
+            if i + 1 >= max_candidates:
+                break
+        self.author_registry.set(first_name, last_name, 'google_scholar', scholar_id)
+        return scholar_id
+
+    def fetch_from_dblp(self, first_name, last_name, years=None, cancel_token=None):
+        try:
+            pid = self.resolve_dblp_pid(first_name, last_name)
+        except Exception as e:
+            self.update_progress(f"Could not resolve DBLP author, falling back to full-text search: {str(e)}")
+            logger.exception("Exception in resolve_dblp_pid")
+            pid = None
+
+        if pid:
+            self.update_progress(f"Using DBLP person ID: {pid}")
+            try:
+                return self.fetch_dblp_person(first_name, last_name, pid, years, cancel_token)
+            except Exception as e:
+                self.update_progress(f"Error fetching DBLP person {pid}: {str(e)}")
+                logger.exception("Exception in fetch_dblp_person")
+                return []
+        return self.search_dblp_publications(first_name, last_name, years, cancel_token)
+
+    def resolve_dblp_pid(self, first_name, last_name):
+        pid = self.author_registry.get(first_name, last_name, 'dblp')
+        metrics.cache_lookup('author_registry', pid is not None)
+        if pid is not None:
+            return pid
+
+        query = f"{first_name} {last_name}"
+        params = {'q': query, 'format': 'json', 'h': 10}
+        response = self.http.get(f'{DBLP_API}/search/author/api', params=params, timeout=30)
+        metrics.record_request('dblp', response)
+        response.raise_for_status()
+        pid = ''
+        for hit in response.json().get('result', {}).get('hits', {}).get('hit', []):
+            info = hit.get('info', {})
+            # DBLP disambiguates homonyms with a numeric suffix such as "Max Mustermann 0001"
+            name = re.sub(r'\s\d{4}$', '', info.get('author', ''))
+            url = info.get('url', '')
+            if '/pid/' in url and self.author_match(query, name):
+                pid = url.split('/pid/', 1)[1]
+                break
+        self.author_registry.set(first_name, last_name, 'dblp', pid)
+        return pid
+
+    def fetch_dblp_person(self, first_name, last_name, pid, years=None, cancel_token=None):
+        """
+        Fetches the publication list of one DBLP person. The person page has
+        no year parameter, so records outside `years` are skipped before
+        they are parsed.
+        """
+        wanted_years = {str(year).strip() for year in years} if years else None
+        check_cancelled(cancel_token)
+        response = self.http.get(f'{DBLP_API}/pid/{pid}.xml', timeout=60)
+        metrics.record_request('dblp', response)
+        response.raise_for_status()
+        root = ElementTree.fromstring(response.content)
+
+        # Person pages often link the ORCID, which helps to verify Crossref results
+        if self.author_registry.get(first_name, last_name, 'orcid') is None:
+            for url in root.iterfind('person/url'):
+                if url.text and 'orcid.org/' in url.text:
+                    self.author_registry.set(first_name, last_name, 'orcid', url.text.rsplit('/', 1)[-1])
+                    break
+
+        publications = []
+        for record in root.iterfind('r/*'):
+            if wanted_years is not None and record.findtext('year', '') not in wanted_years:
+                continue
+            authors_list = [re.sub(r'\s\d{4}$', '', a.text or '') for a in record.findall('author')]
+            title = record.find('title')
+            doi = ''
+            for ee in record.findall('ee'):
+                if ee.text and ee.text.startswith('https://doi.org/'):
+                    doi = ee.text[len('https://doi.org/'):]
+                    break
+            publications.append({
+                'title': ''.join(title.itertext()) if title is not None else '',
+                'year': record.findtext('year', ''),
+                'author': ', '.join(authors_list),
+                'doi': doi,
+                'ENTRYTYPE': 'article',
+                'ID': doi or f"DBLP_{record.get('key', '')}"
+            })
+        return publications
+
+    def search_dblp_publications(self, first_name, last_name, years=None, cancel_token=None):
         publications = []
         query = f"{first_name} {last_name}"
         try:
-            url = f'https://dblp.org/search/publ/api?q=author%3A{first_name}%20{last_name}&format=json&h=1000'
-            response = requests.get(url)
+            # Exact year facets ("year:2020:") are ORed with "|" so DBLP returns only those years
+            search = f"author:{first_name} {last_name}"
+            year_terms = [f"year:{year}:" for first, last in year_spans(years) for year in range(first, last + 1)]
+            if year_terms:
+                search += ' ' + '|'.join(year_terms)
+            params = {'q': search, 'format': 'json', 'h': 1000}
+            check_cancelled(cancel_token)
+            response = self.http.get(f'{DBLP_API}/search/publ/api', params=params, timeout=60)
+            metrics.record_request('dblp', response)
             data = response.json()
 
             hits = data.get('result', {}).get('hits', {}).get('hit', [])
@@ -625,7 +1078,7 @@ class PublicationApp:
             'issue': item.get('issue', ''),
             'published-print': published_print_str,
             'published-online': published_online_str,
-            'reference-count': str(item.get('reference-count', '')),  # Convert to string
+            'reference-count': str(item.get('reference-count', item.get('references-count', ''))),  # Convert to string
             'subject': ', '.join(item.get('subject', [])),
             'ENTRYTYPE': item.get('type', 'article'),  # Default to 'article' if not specified
             'ID': unique_id  # Use the generated unique ID
@@ -643,60 +1096,100 @@ class PublicationApp:
         return unique_pubs
 
     def save_crawled_publications_to_file(self, df):
+        return self.scheduler.submit(
+            "Save crawled publications", self._save_crawled_publications,
+            df.to_dict('records'), list(df.columns), group='export',
+        )
+
+    def _save_crawled_publications(self, records, columns, cancel_token=None):
         try:
-            df.to_csv('crawled_publications.csv', index=False)
+            exporter.write_csv(records, 'crawled_publications.csv', columns, cancel_token)
             self.update_progress("Crawled publications saved to 'crawled_publications.csv'")
         except Exception as e:
             self.update_progress(f"Error saving crawled publications: {str(e)}")
             logger.exception("Exception in save_crawled_publications_to_file")
 
+    def export_missing_publications(self, missing_pubs):
+        # The full set goes to disk in the background; the UI only shows a preview.
+        # An export of an older classification that has not finished yet is superseded.
+        if self._export_job is not None:
+            self.scheduler.cancel(self._export_job.id)
+        self._export_job = None
+        if not missing_pubs.empty:
+            self._export_job = self.scheduler.submit(
+                f"Export {len(missing_pubs)} missing publications", self._export_missing_publications,
+                missing_pubs.to_dict('records'), group='export',
+            )
+        return self._export_job
+
+    def _export_missing_publications(self, records, cancel_token=None):
+        try:
+            # The match reason goes into the CSV and JSON Lines files, not into the BibTeX entries
+            entries = [{key: value for key, value in record.items() if key != REASON_COLUMN} for record in records]
+            paths = exporter.export_publications(entries, EXPORT_BASENAME, ('bib',), cancel_token)
+            paths.update(exporter.export_publications(records, EXPORT_BASENAME, ('csv', 'jsonl'), cancel_token))
+            self.update_progress(f"Exported {len(records)} missing publications to {', '.join(paths.values())}")
+        except KeyError as e:
+            self.update_progress(f"BibTeX writing error: Missing key {e}")
+            logger.exception("KeyError in export_missing_publications")
+        except Exception as e:
+            self.update_progress(f"Error exporting missing publications: {str(e)}")
+            logger.exception("Exception in export_missing_publications")
+
     def convert_to_dataframe(self, publications, years, first_name, last_name):
+        if self.bib_index is not None and publications is self.publications:
+            return self._convert_from_index(years, first_name, last_name)
+        # Only the requested years are visited instead of the whole library
+        data = []
+        for year in dict.fromkeys(years):
+            for pub in publications.get(year, []):
+                if self.author_match(f"{first_name} {last_name}", pub.get('author', '')):
+                    data.append(pub)
+        return pd.DataFrame(data)
+
+    def _convert_from_index(self, years, first_name, last_name):
+        # Only entries that list the last name and fall into the requested years are decoded
+        candidates = set(self.bib_index.lookup_author(last_name))
         data = []
-        for year, pubs in publications.items():
-            if year in years:
-                for pub in pubs:
+        for year in dict.fromkeys(years):
+            for record_id in self.bib_index.year_range(year):
+                if record_id in candidates:
+                    pub = self.bib_index.record(record_id)
                     if self.author_match(f"{first_name} {last_name}", pub.get('author', '')):
                         data.append(pub)
         return pd.DataFrame(data)
 
-    def compare_publications(self, local_data, crawled_data):
-        def normalize_text(text):
-            if not isinstance(text, str):
-                text = str(text)
-            text = re.sub(r'{\\[a-z]{1,2}}', '', text)
-            text = re.sub(r'{\\\w+\s*}', '', text)
-            text = re.sub(r'[^\w\s]', '', text.lower())
-            return text
-
-        def is_similar(pub1, pub2, doi_threshold=90, title_threshold=80):
-            doi1 = normalize_text(pub1.get('doi', ''))
-            doi2 = normalize_text(pub2.get('doi', ''))
-            title1 = normalize_text(pub1.get('title', ''))
-            title2 = normalize_text(pub2.get('title', ''))
-
-            # First, compare DOIs
-            doi_similarity = fuzz.ratio(doi1, doi2)
-            if doi_similarity >= doi_threshold and doi1:
-                return True
-
-            # If DOIs are not similar, compare titles
-            title_similarity = fuzz.ratio(title1, title2)
-            return title_similarity >= title_threshold
-
-        missing_pubs = []
-        extra_pubs = []
-
-        for _, crawled_pub in crawled_data.iterrows():
-            if not any(is_similar(crawled_pub, local_pub) for _, local_pub in local_data.iterrows()):
-                missing_pubs.append(crawled_pub)
-
-        for _, local_pub in local_data.iterrows():
-            if not any(is_similar(local_pub, crawled_pub) for _, crawled_pub in crawled_data.iterrows()):
-                extra_pubs.append(local_pub)
-
-        # Convert lists to DataFrames
-        missing_pubs_df = pd.DataFrame(missing_pubs)
-        extra_pubs_df = pd.DataFrame(extra_pubs)
+    def compare_publications(self, local_data, crawled_data, cancel_token=None):
+        # Normalize every record once, then score all pairs (in parallel for large inputs)
+        with metrics.span('normalize'):
+            local_norm = pub_compare.normalize_records(local_data.to_dict('records'))
+            crawled_norm = pub_compare.normalize_records(crawled_data.to_dict('records'))
+
+        with metrics.span('compare'):
+            scores = self.score_cache.score(local_norm, crawled_norm, cancel_token=cancel_token)
+            metrics.count('compare.pairs', len(local_data) * len(crawled_data))
+
+        # Kept so that threshold changes only re-classify
+        self.comparison = (local_data, crawled_data, scores)
+        return self.classify_comparison(local_data, crawled_data, scores)
+
+    def classify_comparison(self, local_data, crawled_data, scores):
+        doi_threshold, title_threshold = self.doi_threshold, self.title_threshold
+        missing_idx, extra_idx = pub_compare.classify(scores, doi_threshold, title_threshold)
+
+        def with_reasons(data, side, positions, other):
+            result = data.iloc[positions].copy()
+            other_titles = other['title'].tolist() if 'title' in other else [''] * len(other)
+            reasons = []
+            for reason, candidate in pub_compare.match_reasons(scores, side, positions, doi_threshold, title_threshold):
+                if candidate >= 0:
+                    reason += f"; closest: {str(other_titles[candidate])[:80]}"
+                reasons.append(reason)
+            result[REASON_COLUMN] = reasons
+            return result
+
+        missing_pubs_df = with_reasons(crawled_data, 'crawled', missing_idx, local_data)
+        extra_pubs_df = with_reasons(local_data, 'local', extra_idx, crawled_data)
 
         # Remove duplicates in missing publications
         if not missing_pubs_df.empty:
@@ -704,35 +1197,63 @@ class PublicationApp:
 
         return missing_pubs_df, extra_pubs_df
 
+    def on_threshold_changed(self, *args):
+        try:
+            doi_threshold, title_threshold = self.doi_threshold_var.get(), self.title_threshold_var.get()
+        except tk.TclError:
+            return  # incomplete input while typing
+        if (doi_threshold, title_threshold) == (self.doi_threshold, self.title_threshold):
+            return
+        self.doi_threshold, self.title_threshold = doi_threshold, title_threshold
+        if self.comparison is not None:
+            self.reclassify()
+
+    def reclassify(self):
+        # Runs on the Tk thread; no similarity is recomputed
+        local_data, crawled_data, scores = self.comparison
+        missing_pubs, extra_pubs = self.classify_comparison(local_data, crawled_data, scores)
+        self._display_missing_publications(missing_pubs)
+        self._display_extra_publications(extra_pubs)
+        self._display_missing_bibtex(missing_pubs)
+        self._update_statistics(len(local_data), len(crawled_data), len(local_data) - len(extra_pubs), len(missing_pubs), len(extra_pubs))
+        self.export_missing_publications(missing_pubs)
+        self.update_progress(f"Re-classified with DOI threshold {self.doi_threshold} and title threshold {self.title_threshold}: "
+                             f"{len(missing_pubs)} missing, {len(extra_pubs)} extra.")
+
     def display_missing_publications(self, missing_pubs):
         self.master.after(0, lambda: self._display_missing_publications(missing_pubs))
 
     def _display_missing_publications(self, missing_pubs):
-        # Clear the Treeview
-        for item in self.missing_tree.get_children():
-            self.missing_tree.delete(item)
-
-        for _, pub in missing_pubs.iterrows():
-            title = pub.get('title', 'No title')
-            authors = pub.get('author', 'Unknown author')
-            year = pub.get('year', 'Unknown')
-            doi = pub.get('doi', '')
-            self.missing_tree.insert('', tk.END, values=(title, authors, year, doi))
+        with metrics.span('render.missing'):
+            # Clear the Treeview
+            for item in self.missing_tree.get_children():
+                self.missing_tree.delete(item)
+
+            for _, pub in missing_pubs.head(PREVIEW_ENTRIES).iterrows():
+                title = pub.get('title', 'No title')
+                authors = pub.get('author', 'Unknown author')
+                year = pub.get('year', 'Unknown')
+                doi = pub.get('doi', '')
+                self.missing_tree.insert('', tk.END, values=(title, authors, year, doi, pub.get(REASON_COLUMN, '')))
+            if len(missing_pubs) > PREVIEW_ENTRIES:
+                more = len(missing_pubs) - PREVIEW_ENTRIES
+                self.missing_tree.insert('', tk.END, values=(f"... {more} more in {EXPORT_BASENAME}.csv", '', '', '', ''))
 
     def display_extra_publications(self, extra_pubs):
         self.master.after(0, lambda: self._display_extra_publications(extra_pubs))
 
     def _display_extra_publications(self, extra_pubs):
-        # Clear the Extra Treeview
-        for item in self.extra_tree.get_children():
-            self.extra_tree.delete(item)
-
-        for _, pub in extra_pubs.iterrows():
-            title = pub.get('title', 'No title')
-            authors = pub.get('author', 'Unknown author')
-            year = pub.get('year', 'Unknown')
-            doi = pub.get('doi', '')
-            self.extra_tree.insert('', tk.END, values=(title, authors, year, doi))
+        with metrics.span('render.extra'):
+            # Clear the Extra Treeview
+            for item in self.extra_tree.get_children():
+                self.extra_tree.delete(item)
+
+            for _, pub in extra_pubs.iterrows():
+                title = pub.get('title', 'No title')
+                authors = pub.get('author', 'Unknown author')
+                year = pub.get('year', 'Unknown')
+                doi = pub.get('doi', '')
+                self.extra_tree.insert('', tk.END, values=(title, authors, year, doi, pub.get(REASON_COLUMN, '')))
 
     def update_statistics(self, local_count, crawled_count, common_count, missing_count, extra_count):
         self.master.after(0, lambda: self._update_statistics(local_count, crawled_count, common_count, missing_count, extra_count))
@@ -747,75 +1268,38 @@ class PublicationApp:
         self.statistics_text.insert(tk.END, stats)
 
     def display_missing_bibtex(self, missing_pubs):
-        self.master.after(0, lambda: self._display_missing_bibtex(missing_pubs))
+        # The preview is formatted on the calling worker; only the text insert runs on the Tk thread
+        preview = self.format_bibtex_preview(missing_pubs)
+        self.master.after(0, lambda: self._show_bibtex_preview(preview))
 
     def _display_missing_bibtex(self, missing_pubs):
-        writer = BibTexWriter()
-        writer.indent = '    '
-        bib_db = BibDatabase()
-        # Convert DataFrame to list of dictionaries
-        entries = missing_pubs.to_dict('records')
-        # Ensure all fields in entries are strings
-        for entry in entries:
-            for key in entry:
-                if not isinstance(entry[key], str):
-                    entry[key] = str(entry[key])
-        bib_db.entries = entries
-        bib_db.comments = []       # Initialize as empty list
-        bib_db.preambles = []      # Initialize as empty list
-        bib_db.strings = {}        # Initialize as empty dict
+        self._show_bibtex_preview(self.format_bibtex_preview(missing_pubs))
+
+    def format_bibtex_preview(self, missing_pubs):
         try:
-            bibtex_str = writer.write(bib_db)
-            self.bibtex_text.delete(1.0, tk.END)
-            self.bibtex_text.insert(tk.END, bibtex_str)
+            entries = missing_pubs.drop(columns=[REASON_COLUMN], errors='ignore').to_dict('records')
+            bibtex_str, more = exporter.bibtex_preview(entries, PREVIEW_ENTRIES)
         except KeyError as e:
             self.update_progress(f"BibTeX writing error: Missing key {e}")
             logger.exception("KeyError in _display_missing_bibtex")
+            return ''
         except Exception as e:
             self.update_progress(f"Unexpected error writing BibTeX: {str(e)}")
             logger.exception("Unexpected error in _display_missing_bibtex")
+            return ''
+        if more:
+            bibtex_str += f"% ... {more} more entries in {EXPORT_BASENAME}.bib\n"
+        return bibtex_str
+
+    def _show_bibtex_preview(self, bibtex_str):
+        with metrics.span('render.bibtex'):
+            self.bibtex_text.delete(1.0, tk.END)
+            self.bibtex_text.insert(tk.END, bibtex_str)
 
     def write_bibtex(self, publications, filename):
         try:
-            # Convert the list of publication dictionaries into a DataFrame
-            df = pd.DataFrame(publications)
-
-            # Replace all NaN values with empty strings
-            df.fillna('', inplace=True)
-
-            # Convert the DataFrame back to a list of dictionaries
-            publications = df.to_dict('records')
-
-            # Ensure all fields in entries are strings
-            for entry in publications:
-                for key in entry:
-                    if not isinstance(entry[key], str):
-                        entry[key] = str(entry[key])
-
-            writer = BibTexWriter()
-            writer.indent = '    '
-            bib_db = BibDatabase()
-            bib_db.entries = publications
-            bib_db.comments = []       # Initialize as empty list
-            bib_db.preambles = []      # Initialize as empty list
-            bib_db.strings = {}        # Initialize as empty dict
-
-            # Validate and sanitize each entry
-            for entry in bib_db.entries:
-                # Ensure 'ENTRYTYPE' and 'ID' are present
-                if 'ENTRYTYPE' not in entry:
-                    raise KeyError(f"Missing 'ENTRYTYPE' in entry: {entry.get('ID', 'Unknown ID')}")
-                if 'ID' not in entry:
-                    raise KeyError(f"Missing 'ID' in entry: {entry.get('ENTRYTYPE', 'Unknown ENTRYTYPE')}")
-
-                # Optional: Remove fields that are empty to clean up the BibTeX entries
-                keys_to_remove = [key for key, value in entry.items() if value == '']
-                for key in keys_to_remove:
-                    del entry[key]
-
-            with open(filename, 'w', encoding='utf-8') as bibtex_file:
-                bibtex_file.write(writer.write(bib_db))
-            self.update_progress(f"Wrote {len(publications)} entries to {filename}")
+            count = exporter.write_bibtex(publications, filename)
+            self.update_progress(f"Wrote {count} entries to {filename}")
             with open(filename, 'r', encoding='utf-8') as f:
                 self.update_progress(f"First 500 characters of {filename}:")
                 self.update_progress(f.read(500))
@@ -925,7 +1409,12 @@ class PublicationApp:
             self.update_progress(f"Error displaying BibTeX: {str(e)}")
             logger.exception("Error in display_single_bibtex")
 
-if __name__ == "__main__":
+def main():
+    setup_logging()
     root = tk.Tk()
     app = PublicationApp(root)
     root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,54 @@
+"""
+Download of the department's publication list from TUbiblio.
+
+    python tu_biblio_api.py sync                 # year shards, only changes are written
+    python tu_biblio_api.py sync --years 2023-2024 --workers 8
+    python tu_biblio_api.py sync --full          # one request for the complete export
+
+`sync` requests the export as one shard per year in parallel and streams each
+response to disk while hashing it. A shard whose bytes are unchanged (or that
+the server answers with 304) is not parsed at all. For changed shards every
+BibTeX entry is hashed separately, and only added, changed and removed entries
+are applied to TK_Publikationen_Komplett.bib and publications_cache.pubc. The
+hashes, ETags and entry order per shard are kept in tubiblio_manifest.json.
+"""
+import argparse
+import hashlib
 import json
+import os
+import re
+import tempfile
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
 
 import requests
 from bibtexparser.bparser import BibTexParser
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+import pub_cache
+from atomic_file import atomic_writer
+
+BIB_FILE = 'TK_Publikationen_Komplett.bib'
+CACHE_FILE = 'publications_cache.pubc'
+# Read once if no binary cache exists yet
+LEGACY_CACHE_FILE = 'publications_cache.json'
+MANIFEST_FILE = 'tubiblio_manifest.json'
+UNKNOWN_YEAR = 'Unbekannt'
+
+EXPORT_URL = "https://tubiblio.ulb.tu-darmstadt.de/cgi/search/archive/advanced/export_tubiblio_BibTeX.bib"
+# EPrints search expression: order|dataset|-|search fields|-|filters
+EXPORT_ORDER = '-date/creators_name/title'
+EXPORT_FIELDS = ['divisions:divisions:ANY:EQ:fb20_tk']
+EXPORT_FILTERS = ['eprint_status:eprint_status:ANY:EQ:archive', 'metadata_visibility:metadata_visibility:ANY:EQ:show']
+# Oldest year requested as a shard; entries with other years are only covered by --full
+FIRST_YEAR = int(os.environ.get('TUBIBLIO_FIRST_YEAR', 1980))
+
+_ENTRY_START = re.compile(r'^@\w+\s*\{', re.MULTILINE)
+_ENTRY_KEY = re.compile(r'^@\w+\s*\{\s*([^,\s]+)\s*,')
+_ENTRY_YEAR = re.compile(r'^\s*year\s*=\s*[{"]?(\d{4})', re.MULTILINE | re.IGNORECASE)
 
 
 def fetch_publications(url):
@@ -18,25 +64,233 @@ def parse_bibtex(bibtex_str):
 def organize_by_year(entries):
     publications_by_year = defaultdict(list)
     for entry in entries:
-        year = entry.get('year', 'Unbekannt')
+        year = entry.get('year', UNKNOWN_YEAR)
         publications_by_year[year].append(entry)
     return publications_by_year
 
-def save_bibtex_data(bibtex_str, filename='TK_Publikationen_Komplett.bib'):
-    with open(filename, 'w', encoding='utf-8') as file:
-        file.write(bibtex_str)
+def save_bibtex_data(bibtex_str, filename=BIB_FILE):
+    _write_atomic(filename, bibtex_str)
     print(f"Daten erfolgreich in {filename} gespeichert.")
 
-def cache_data(data, filename='publications_cache.json'):
-    with open(filename, 'w') as file:
-        json.dump(data, file, indent=4)
+def cache_data(data, filename=CACHE_FILE):
+    pub_cache.write_cache(data, filename)
+
+
+def _write_atomic(filename, text):
+    with atomic_writer(filename) as file:
+        file.write(text)
+
+
+def export_url(year=None):
+    """Returns the BibTeX export URL, restricted to one publication year if given."""
+    fields = list(EXPORT_FIELDS)
+    if year is not None:
+        fields.insert(0, f'date:date:ALL:EQ:{year}')
+    exp = '|'.join(['0', '1', EXPORT_ORDER, 'archive', '-'] + fields + ['-'] + EXPORT_FILTERS)
+    return (f"{EXPORT_URL}?dataset=archive&screen=Search&_action_export=1&output=BibTeX"
+            f"&exp={quote(exp, safe='')}&n=")
+
+
+def split_entries(bibtex_str):
+    """Splits raw BibTeX text into {key: entry text}, keeping the export order."""
+    starts = [match.start() for match in _ENTRY_START.finditer(bibtex_str)]
+    entries = {}
+    for start, end in zip(starts, starts[1:] + [len(bibtex_str)]):
+        text = bibtex_str[start:end].strip()
+        key = _ENTRY_KEY.match(text)
+        if key:
+            entries[key.group(1)] = text
+    return entries
+
+
+def entry_year(text):
+    match = _ENTRY_YEAR.search(text)
+    return match.group(1) if match else UNKNOWN_YEAR
+
+
+def entry_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def load_manifest(filename=MANIFEST_FILE):
+    if os.path.exists(filename):
+        with open(filename, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    return {'shards': {}}
+
+
+def download_shard(session, shard, url, state):
+    """
+    Streams one shard to a temporary file while hashing it. Returns
+    (shard, text or None if unchanged, new shard state).
+    """
+    headers = {}
+    if state.get('etag'):
+        headers['If-None-Match'] = state['etag']
+    if state.get('last_modified'):
+        headers['If-Modified-Since'] = state['last_modified']
+
+    with session.get(url, headers=headers, stream=True, timeout=300) as response:
+        if response.status_code == 304:
+            return shard, None, state
+        response.raise_for_status()
+        part = tempfile.NamedTemporaryFile('wb', suffix='.bib.part', dir='.', delete=False)
+        try:
+            digest = hashlib.sha1()
+            size = 0
+            with part:
+                for chunk in response.iter_content(chunk_size=1 << 16):
+                    digest.update(chunk)
+                    part.write(chunk)
+                    size += len(chunk)
+            new_state = dict(state, etag=response.headers.get('ETag'), last_modified=response.headers.get('Last-Modified'),
+                             sha1=digest.hexdigest(), bytes=size)
+            if new_state['sha1'] == state.get('sha1'):
+                return shard, None, new_state
+            # requests assumes ISO-8859-1 for text/* without a charset; the export is UTF-8
+            encoding = response.encoding if 'charset' in response.headers.get('Content-Type', '') else 'utf-8'
+            with open(part.name, 'r', encoding=encoding, errors='replace') as file:
+                return shard, file.read(), new_state
+        finally:
+            # Also removes a partial download after a timeout or connection reset
+            os.remove(part.name)
+
+
+def read_local_store(bib_file=BIB_FILE):
+    """Returns the local entries as {year: {key: text}}."""
+    store = defaultdict(dict)
+    if os.path.exists(bib_file):
+        with open(bib_file, 'r', encoding='utf-8') as file:
+            for key, text in split_entries(file.read()).items():
+                store[entry_year(text)][key] = text
+    return store
+
+
+def read_cached_years(years, cache_file=CACHE_FILE):
+    """Returns the cached entries of `years` by key, decoding only those years."""
+    if os.path.exists(cache_file):
+        with pub_cache.PubCache(cache_file) as cache:
+            return {entry.get('ID'): entry for year in years for entry in cache.load_year(year)}
+    if os.path.exists(LEGACY_CACHE_FILE):
+        with open(LEGACY_CACHE_FILE, 'r', encoding='utf-8') as file:
+            return {entry.get('ID'): entry for year, entries in json.load(file).items() if year in years for entry in entries}
+    return {}
+
+
+def sync(years=None, full=False, workers=4, bib_file=BIB_FILE, cache_file=CACHE_FILE, manifest_file=MANIFEST_FILE):
+    """
+    Synchronizes the local BibTeX file and publication cache with TUbiblio and
+    returns the number of added, changed and removed entries.
+    """
+    started = time.time()
+    manifest = load_manifest(manifest_file)
+    store = read_local_store(bib_file)
+
+    if full:
+        shards = {'all': export_url()}
+    else:
+        if years is None:
+            years = range(FIRST_YEAR, time.localtime().tm_year + 1)
+        shards = {str(year): export_url(year) for year in years}
+
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+    session.mount('https://', HTTPAdapter(max_retries=retries, pool_maxsize=workers))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(
+            lambda item: download_shard(session, item[0], item[1], manifest['shards'].get(item[0], {})),
+            shards.items()))
+
+    added = changed = removed = 0
+    changed_entries = {}
+    dirty_years = set()
+    skipped = []
+    for shard, text, state in results:
+        if text is None:
+            manifest['shards'][shard] = state
+            continue
+        remote = split_entries(text)
+        # An empty body, an HTML error page or a broken search expression parses to no entries.
+        # Such a shard must not wipe entries that exist locally; its old state is kept, so the
+        # next sync requests it again. Removing whole years is left to a non-empty --full export.
+        local_entries = sum(map(len, store.values())) if shard == 'all' else len(store.get(shard, {}))
+        if not remote and local_entries:
+            skipped.append(shard)
+            continue
+        manifest['shards'][shard] = state
+        by_year = defaultdict(dict)
+        for key, entry_text in remote.items():
+            by_year[entry_year(entry_text)][key] = entry_text
+        # A year shard owns its year; the full export owns every year
+        owned_years = set(store) | set(by_year) if shard == 'all' else {shard}
+        for year in owned_years:
+            old_entries = store.get(year, {})
+            new_entries = by_year.get(year, {})
+            for key, entry_text in new_entries.items():
+                if key not in old_entries:
+                    added += 1
+                    changed_entries[key] = entry_text
+                elif entry_hash(old_entries[key]) != entry_hash(entry_text):
+                    changed += 1
+                    changed_entries[key] = entry_text
+            removed += len(old_entries.keys() - new_entries.keys())
+            if list(old_entries.items()) != list(new_entries.items()):
+                dirty_years.add(year)
+            if new_entries or year in store:
+                store[year] = new_entries
+
+    # Newest year first, like the export itself
+    ordered_years = sorted(store, key=lambda y: (y.isdigit(), y), reverse=True)
+    if added or changed or removed:
+        bib_text = '\n\n'.join(text for year in ordered_years for text in store[year].values()) + '\n'
+        save_bibtex_data(bib_text, bib_file)
+    if not os.path.exists(cache_file):
+        dirty_years = set(store)
+
+    if dirty_years:
+        # Only the changed years are decoded and re-encoded, and only added or changed entries are parsed
+        parsed = {entry['ID']: entry for entry in parse_bibtex('\n\n'.join(changed_entries.values()))}
+        cached = read_cached_years(dirty_years, cache_file)
+        new_years = {}
+        for year in dirty_years:
+            entries = [parsed.get(key) or cached.get(key) for key in store[year]]
+            missing = [key for key, entry in zip(store[year], entries) if entry is None]
+            if missing:
+                # Entries absent from an older cache are parsed as well
+                parsed.update({entry['ID']: entry for entry in parse_bibtex('\n\n'.join(store[year][key] for key in missing))})
+                entries = [parsed.get(key) or cached.get(key) for key in store[year]]
+            new_years[year] = [entry for entry in entries if entry is not None]
+        pub_cache.update_cache(cache_file, new_years, order=ordered_years)
+
+    manifest['synced'] = time.strftime('%Y-%m-%d %H:%M:%S')
+    _write_atomic(manifest_file, json.dumps(manifest, indent=2, sort_keys=True))
+
+    if skipped:
+        print(f"Warnung: {', '.join(skipped)} ohne BibTeX-Einträge geliefert, lokale Einträge wurden beibehalten.")
+    downloaded = sum(1 for _, text, _ in results if text is not None)
+    print(f"{len(shards)} Abfragen, {downloaded} geänderte Teile: {added} neu, {changed} geändert, "
+          f"{removed} entfernt ({time.time() - started:.1f}s).")
+    return added, changed, removed
+
+
+def parse_year_range(text):
+    first, _, last = text.partition('-')
+    return range(int(first), int(last or first) + 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synchronize the TUbiblio publication export")
+    subparsers = parser.add_subparsers(dest='command')
+    sync_parser = subparsers.add_parser('sync', help="download changed publications (default)")
+    sync_parser.add_argument('--years', type=parse_year_range, help="year or range to sync, e.g. 2023-2024")
+    sync_parser.add_argument('--full', action='store_true', help="request the complete export in one shard")
+    sync_parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    if args.command in (None, 'sync'):
+        sync(getattr(args, 'years', None), getattr(args, 'full', False), getattr(args, 'workers', 4))
 
-# URL für die API-Anfrage
-url = "https://tubiblio.ulb.tu-darmstadt.de/cgi/search/archive/advanced/export_tubiblio_BibTeX.bib?dataset=archive&screen=Search&_action_export=1&output=BibTeX&exp=0%7C1%7C-date%2Fcreators_name%2Ftitle%7Carchive%7C-%7Cdivisions%3Adivisions%3AANY%3AEQ%3Afb20_tk%7C-%7Ceprint_status%3Aeprint_status%3AANY%3AEQ%3Aarchive%7Cmetadata_visibility%3Ametadata_visibility%3AANY%3AEQ%3Ashow&n=&cache=8102631"
 
-# Funktionen verwenden, um Daten abzurufen und zu speichern
-bibtex_data = fetch_publications(url)
-entries = parse_bibtex(bibtex_data)
-publications_by_year = organize_by_year(entries)
-cache_data(publications_by_year)  # Speichert das Dictionary als JSON
-save_bibtex_data(bibtex_data)  # Speichert die rohen BibTeX-Daten
+if __name__ == '__main__':
+    main()